@@ -1,13 +1,27 @@
 import os
+import re
+import json
 import time
+import threading
 import traceback
-import praw
-from camel.agents import ChatAgent
-from camel.toolkits import RedditToolkit
-from camel.models import ModelFactory
-from camel.types import ModelPlatformType, ModelType
-from camel.configs import ChatGPTConfig
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
+from llm_cache import llm_cache
+from metrics import metrics, timed
+from ratelimit import reddit_governor, model_governor
+from singleflight import fetch_flight, agent_flight
+from dedup import cluster_comments, cluster_key, DEDUP_ENABLED
+from selection import KeywordMatcher, select_top_comments
+from sentiment import triage_sentiment, TIER_LOCAL, TIER_LLM
+from claims import detect_claims, NO_CLAIM
+from prompts import fit_items, count_tokens, clip
+from posting import flair_cache, submit_retry_delay, POST_MAX_RETRIES
+
+# camel, praw and the clients/agents built from them are created lazily on first use
+# (see get_model / get_reddit_toolkit / get_reddit / _main_agent), so importing this
+# module is cheap and read-only deployments don't need posting credentials.
 
 # ---------------- Load environment variables ---------------- #
 load_dotenv("api.env")
@@ -19,31 +33,128 @@ REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT")
 REDDIT_USERNAME = os.getenv("REDDIT_USERNAME")
 REDDIT_PASSWORD = os.getenv("REDDIT_PASSWORD")
 
-if not all([REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT, REDDIT_USERNAME, REDDIT_PASSWORD]):
-    raise ValueError("Please set Reddit API credentials (including username & password) in your .env file!")
+READ_CREDENTIALS = ("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USER_AGENT")
+POST_CREDENTIALS = READ_CREDENTIALS + ("REDDIT_USERNAME", "REDDIT_PASSWORD")
+
+
+def _require(capability, names):
+    missing = [name for name in names if not os.getenv(name)]
+    if missing:
+        raise ValueError(f"Please set {', '.join(missing)} in your .env file to use {capability}!")
+
+
+# ---------------- Lazy resources ---------------- #
+_resources = {}
+_resources_lock = threading.RLock()
+
+
+def _resource(name, factory):
+    """Build `name` once per process (thread-safe) and reuse it afterwards."""
+    with _resources_lock:
+        if name not in _resources:
+            _resources[name] = factory()
+        return _resources[name]
+
 
 # ---------------- Initialize OpenAI model ---------------- #
-model = ModelFactory.create(
-    model_platform=ModelPlatformType.OPENAI,
-    model_type=ModelType.GPT_4O,
-    model_config_dict=ChatGPTConfig(temperature=0.2).as_dict(),
-)
+MODEL_NAME = "gpt-4o"
+MODEL_TEMPERATURE = 0.2
+
+
+def _create_model():
+    _require("the OpenAI model", ("OPENAI_API_KEY",))
+    from camel.models import ModelFactory
+    from camel.types import ModelPlatformType, ModelType
+    from camel.configs import ChatGPTConfig
+
+    return ModelFactory.create(
+        model_platform=ModelPlatformType.OPENAI,
+        model_type=ModelType(MODEL_NAME),
+        model_config_dict=ChatGPTConfig(temperature=MODEL_TEMPERATURE).as_dict(),
+    )
+
+
+def get_model():
+    return _resource("model", _create_model)
+
 
 # ---------------- Initialize Reddit Toolkit ---------------- #
-reddit_toolkit = RedditToolkit(retries=3, delay=2, timeout=120)
+def _create_reddit_toolkit():
+    _require("Reddit reading", READ_CREDENTIALS)
+    from camel.toolkits import RedditToolkit
+
+    return RedditToolkit(retries=3, delay=2, timeout=120)
+
+
+def get_reddit_toolkit():
+    return _resource("reddit_toolkit", _create_reddit_toolkit)
+
 
 # ---------------- Initialize PRAW for posting ---------------- #
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_CLIENT_SECRET,
-    user_agent=REDDIT_USER_AGENT,
-    username=REDDIT_USERNAME,
-    password=REDDIT_PASSWORD
-)
+def _create_reddit():
+    _require("Reddit posting", POST_CREDENTIALS)
+    import praw
 
-# ---------------- Collector Agent ---------------- #
-collector_agent = ChatAgent(
+    return praw.Reddit(
+        client_id=os.getenv("REDDIT_CLIENT_ID"),
+        client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+        user_agent=os.getenv("REDDIT_USER_AGENT"),
+        username=os.getenv("REDDIT_USERNAME"),
+        password=os.getenv("REDDIT_PASSWORD")
+    )
+
+
+def get_reddit():
+    return _resource("reddit", _create_reddit)
+
+
+# ---------------- Pluggable backends ---------------- #
+# Benchmarks and offline runs can swap in a fake Reddit client and a fake model.
+_reddit_override = None
+_agent_backend = None
+
+
+def set_reddit_client(client):
+    """Use `client` (anything PRAW-like) for fetching instead of the toolkit's praw.Reddit; None restores it."""
+    global _reddit_override
+    _reddit_override = client
+
+
+def set_agent_backend(backend):
     """
+    Route agent calls to `backend.step(name, system_prompt, prompt) -> str` instead of
+    ChatAgent; None restores the real model.
+    """
+    global _agent_backend
+    _agent_backend = backend
+
+
+def _reddit_client():
+    return _reddit_override or get_reddit_toolkit().reddit
+
+# ---------------- Fetch concurrency & pacing ---------------- #
+FETCH_MAX_WORKERS = 8          # posts fetched/summarized in parallel
+
+
+def _reddit_limits(client):
+    # praw updates auth.limits from Reddit's X-Ratelimit-* headers after every request.
+    return getattr(getattr(client, "auth", None), "limits", None)
+
+# ---------------- Comment selection ---------------- #
+KEYWORD_WORD_BOUNDARY = False  # True: match whole words only
+KEYWORD_CASE_SENSITIVE = False
+COMMENT_MAX_DEPTH = None       # deepest reply level scanned (None = whole tree)
+COMMENT_MAX_SCAN = None        # max comments scanned per post (None = no limit)
+
+# ---------------- Agent context mode ---------------- #
+# Stateless: every step() sees only the system prompt plus the current item, so prompts
+# stay flat across a run instead of accumulating every earlier comment and summary.
+AGENT_STATELESS = os.getenv("AGENT_STATELESS", "1") != "0"
+# Optional hard cap on tokens per call (system prompt + item); 0/unset disables it.
+AGENT_CONTEXT_TOKEN_LIMIT = int(os.getenv("AGENT_CONTEXT_TOKEN_LIMIT", "0")) or None
+
+# ---------------- Collector Agent ---------------- #
+COLLECTOR_PROMPT = """
 You are a Reddit Data Collector & Summarizer Agent.  
 
 For each post, generate exactly:
@@ -59,49 +170,171 @@ Comments:
 Overall Discussion Tone: <Neutral / Supportive / Critical / Mixed>
 
 If no data, return: "No relevant data found."
-""",
-    model=model,
-    tools=[reddit_toolkit.collect_top_posts]
-)
+"""
 
 # ---------------- Sentiment Agent ---------------- #
-sentiment_agent = ChatAgent(
-    """
+SENTIMENT_PROMPT = """
 You are a Sentiment Analysis Agent.  
 
 Return numeric sentiment score between -1.0 and +1.0
 Only the number.
-""",
-    model=model,
-    tools=[]
-)
+"""
 
 # ---------------- Fact Checker Agent ---------------- #
-factchecker_agent = ChatAgent(
-    """
+FACTCHECKER_PROMPT = """
 You are a Fact-Checking Agent.  
 
 If correct → 'True'
 If incorrect → 'False'
 If cannot verify → 'Unverified'
 Output only one word.
-""",
-    model=model,
-    tools=[]
-)
+"""
+
+# ---------------- Batched Analysis Agent ---------------- #
+ANALYSIS_BATCH_SIZE = 10       # comments per batched sentiment + fact-check request (1 = per-comment calls)
+ANALYSIS_MAX_RETRIES = 2       # re-asks for items whose result could not be parsed
+VERDICTS = ("True", "False", "Unverified")
+
+ANALYSIS_PROMPT = """
+You are a Sentiment Analysis & Fact-Checking Agent.
+
+You receive a JSON array of Reddit comments, each with an "id" and a "text".
+For every comment return an object with:
+  "id": the same id
+  "sentiment": numeric score between -1.0 and +1.0
+  "verdict": 'True' if correct, 'False' if incorrect, 'Unverified' if it cannot be verified
+Output only a JSON array with one object per comment.
+"""
 
 # ---------------- User Comment Generator ---------------- #
-comment_agent = ChatAgent(
-    """
+COMMENT_PROMPT = """
 You are a Reddit Comment Generator Agent.
 Given the most liked comment from a post, generate a new comment
 that is similar in style but adds value or a different perspective.
 Return only the comment text.
-""",
-    model=model,
-    tools=[]
-)
+"""
+
+AGENT_PROMPTS = {
+    "collector": COLLECTOR_PROMPT,
+    "sentiment": SENTIMENT_PROMPT,
+    "factchecker": FACTCHECKER_PROMPT,
+    "analysis": ANALYSIS_PROMPT,
+    "comment": COMMENT_PROMPT,
+}
+
+
+def _new_agent(name):
+    from camel.agents import ChatAgent
+
+    tools = [get_reddit_toolkit().collect_top_posts] if name == "collector" else []
+    return ChatAgent(
+        AGENT_PROMPTS[name],
+        model=get_model(),
+        tools=tools,
+        token_limit=AGENT_CONTEXT_TOKEN_LIMIT,
+    )
+
+
+def _main_agent(name):
+    return _resource(f"{name}_agent", lambda: _new_agent(name))
+
+
+# ChatAgent is not thread-safe, so worker threads get their own agent instances.
+_worker_agents = threading.local()
+
+
+def _get_agent(name):
+    if threading.current_thread() is threading.main_thread():
+        return _main_agent(name)
+    agents = getattr(_worker_agents, "agents", None)
+    if agents is None:
+        agents = _worker_agents.agents = {}
+    if name not in agents:
+        agents[name] = _new_agent(name)
+    return agents[name]
+
+
+def _fit_to_context(name, prompt):
+    """
+    Last-resort cut so system prompt + item stay within AGENT_CONTEXT_TOKEN_LIMIT.
+    Only for free-text prompts: structured ones (the JSON batch) are sized by _fit instead.
+    """
+    if not AGENT_CONTEXT_TOKEN_LIMIT:
+        return prompt
+    return clip(prompt, AGENT_CONTEXT_TOKEN_LIMIT - count_tokens(AGENT_PROMPTS[name]))
+
 
+def _fit(name, fixed_text, items, keywords=()):
+    """
+    Compress prompt items to the agent's token budget (prompts.PROMPT_BUDGETS), capped
+    at AGENT_CONTEXT_TOKEN_LIMIT.
+    """
+    return fit_items(name, AGENT_PROMPTS[name], fixed_text, items, keywords, AGENT_CONTEXT_TOKEN_LIMIT)
+
+
+def _agent_step(name, prompt, use_cache=True, validate=None, structured=False):
+    """
+    Run one agent call and return the reply text ("" if the model sent no message).
+    In stateless mode replies are served from / stored in `llm_cache` unless use_cache=False.
+    validate(reply) -> bool: only replies that pass are cached (or served from the cache),
+    so a malformed reply is asked for again instead of being replayed until it expires.
+    structured=True: the prompt was already fitted with _fit and must not be clipped.
+    """
+    if not structured:
+        prompt = _fit_to_context(name, prompt)
+    if not AGENT_STATELESS:
+        return _call_agent(name, prompt)
+
+    model_id = getattr(_agent_backend, "model_id", None) or f"{MODEL_NAME}:temperature={MODEL_TEMPERATURE}"
+    key = llm_cache.make_key(model_id, AGENT_PROMPTS[name], prompt)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None and validate is not None and not validate(cached):
+            cached = None
+        metrics.record_cache(cached is not None)
+        if cached is not None:
+            return cached
+        # Identical calls already in flight (other threads or sessions) share one request.
+        return agent_flight.do(key, _call_agent, name, prompt, key, validate)
+    # Uncached calls (retries) want a fresh reply, so they don't join a cached call in flight.
+    return agent_flight.do((key, "uncached"), _call_agent, name, prompt)
+
+
+def _call_agent(name, prompt, cache_key=None, validate=None):
+    started = time.perf_counter()
+    usage = None
+    try:
+        if _agent_backend is not None:
+            reply = model_governor.call(_agent_backend.step, name, AGENT_PROMPTS[name], prompt).strip()
+        else:
+            agent = _get_agent(name)
+
+            def step():
+                if AGENT_STATELESS:
+                    agent.reset()
+                return agent.step(prompt)
+            resp = model_governor.call(step)
+            reply = resp.msgs[0].content.strip() if resp.msgs else ""
+            usage = (getattr(resp, "info", None) or {}).get("usage")
+    except Exception:
+        metrics.record_llm(name, time.perf_counter() - started, error=True)
+        raise
+    # Without provider usage data (fake backends), fall back to a chars/token estimate.
+    usage = usage or {
+        "prompt_tokens": count_tokens(AGENT_PROMPTS[name]) + count_tokens(prompt),
+        "completion_tokens": count_tokens(reply),
+    }
+    metrics.record_llm(
+        name, time.perf_counter() - started,
+        usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0,
+    )
+
+    if cache_key and reply and (validate is None or validate(reply)):
+        llm_cache.put(cache_key, reply)
+    return reply
+
+
+@timed("generate_comment_from_best")
 def generate_comment_from_best(fetched_comments):
     """
     fetched_comments: list of dicts with 'Comment Body' and 'Upvotes'
@@ -111,135 +344,502 @@ def generate_comment_from_best(fetched_comments):
 
     # Most liked comment
     best_comment = max(fetched_comments, key=lambda c: c.get('Upvotes', 0))
-    prompt = f"Original Comment: {best_comment['Comment Body']}\nGenerate a new comment in a similar style."
+    template = "Original Comment: {}\nGenerate a new comment in a similar style."
+    prompt = template.format(*_fit("comment", template, [best_comment['Comment Body']]))
 
     try:
-        resp = comment_agent.step(prompt)
-        new_comment = resp.msgs[0].content.strip()
-        return new_comment
+        new_comment = _agent_step("comment", prompt)
+        return new_comment or None
     except Exception as e:
+        metrics.incr("comment_errors")
         print("Error generating comment:", e)
         return None
     
 
 
-def fetch_posts(subreddits, keywords=None, post_limit=None, comment_limit=None):
-    raw_data = []
+def _reddit_call(fn, *args, client=None, **kwargs):
+    """
+    One Reddit request: paced and retried by reddit_governor, timed by metrics.
+    client: the praw.Reddit instance making the request; after a success the governor
+    adapts to that client's rate limits.
+    """
+    def request():
+        with metrics.reddit_request():
+            return fn(*args, **kwargs)
+    limits_source = (lambda: _reddit_limits(client)) if client is not None else None
+    return reddit_governor.call(request, limits_source=limits_source)
+
+
+def _list_top_posts(subreddit, post_limit):
+    client = _reddit_client()
+    return fetch_flight.do(
+        ("top", subreddit.lower(), post_limit),
+        _reddit_call, lambda: list(client.subreddit(subreddit).top(limit=post_limit)), client=client,
+    )
+
+
+def _load_comments(post):
+    """
+    Fetch and expand post's comment tree once per Submission. Listings are shared
+    between sessions, so several threads may hold the same Submission. Reading
+    post.comments is what fetches the tree in PRAW, so the read happens inside the
+    coalesced, governed call, where only one thread runs it. A Submission whose tree
+    is already loaded is skipped. The flight is keyed on the object, not the post id:
+    separate Submission objects for the same post each need their own tree.
+    """
+    def load():
+        # vars(): a missing attribute on a PRAW object would otherwise trigger a fetch.
+        if not vars(post).get("_comments_expanded"):
+            _reddit_call(lambda: post.comments.replace_more(limit=0), client=vars(post).get("_reddit"))
+            post._comments_expanded = True
+    # id() is unique while the flight runs, since every caller holds a reference to post.
+    fetch_flight.do(("comments", id(post)), load)
+
+
+@timed("fetch_post")
+def _fetch_post(subreddit, post, matcher, comment_limit):
+    """Post dict for `post`; concurrent identical fetches share one frozen result."""
+    key = ("post", subreddit, post.id, matcher.key, comment_limit)
+    return fetch_flight.do(key, _build_post, subreddit, post, matcher, comment_limit)
+
+
+def _build_post(subreddit, post, matcher, comment_limit):
+    _load_comments(post)
+    post_comments = select_top_comments(
+        post.comments, matcher, comment_limit, COMMENT_MAX_DEPTH, COMMENT_MAX_SCAN
+    )
+
+    print(f"DEBUG: Post: {post.title}, Top Comments Fetched: {len(post_comments)}")
+
+    try:
+        title, *bodies = _fit(
+            "collector", f"Subreddit: {subreddit}\nPost: \nComments:\n",
+            [post.title] + [c["Comment Body"] for c in post_comments], matcher.keywords,
+        )
+        comments_text = "\n".join([f"{i+1}. {body}" for i, body in enumerate(bodies)])
+        prompt = f"Subreddit: {subreddit}\nPost: {title}\nComments:\n{comments_text}"
+        collector_text = _agent_step("collector", prompt)
+    except Exception:
+        metrics.incr("collector_errors")
+        collector_text = "Collector agent failed"
+
+    return {
+        "Subreddit": subreddit,
+        "Post Title": post.title,
+        "Post Body": getattr(post, "selftext", "") or "",
+        "Post Link": f"https://reddit.com{post.permalink}",
+        "Post Upvotes": getattr(post, "score", 0),
+        "Post Thumbnail": post.thumbnail if hasattr(post, "thumbnail") and post.thumbnail.startswith("http") else None,
+        "Collector Summary": collector_text,
+        "Comments": post_comments
+    }
+
+
+def _iter_fetched(subreddits, keywords, post_limit, comment_limit, max_workers, posts=None):
+    """
+    Yield (index, post dict) in completion order. At most 2 x max_workers posts are in
+    flight at once, so memory stays bounded however many posts are requested.
+    keywords: list of keywords or a prebuilt selection.KeywordMatcher.
+    posts: optional (subreddit, Submission) pairs to fetch instead of each subreddit's
+    top post_limit posts (watch mode passes the posts that are new since its cursor).
+    """
+    max_workers = max_workers or FETCH_MAX_WORKERS
+    matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(
+        keywords, KEYWORD_WORD_BOUNDARY, KEYWORD_CASE_SENSITIVE
+    )
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # Each task runs in a copy of the caller's context, so its work lands in the caller's metrics run.
+        if posts is None:
+            listings = [
+                pool.submit(contextvars.copy_context().run, _list_top_posts, subreddit, post_limit)
+                for subreddit in subreddits
+            ]
+            posts = (
+                (subreddit, post)
+                for subreddit, listing in zip(subreddits, listings)
+                for post in listing.result()
+            )
+        pending = {}
+        for index, (subreddit, post) in enumerate(posts):
+            future = pool.submit(contextvars.copy_context().run, _fetch_post, subreddit, post, matcher, comment_limit)
+            pending[future] = index
+            while len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_posts(subreddits, keywords=None, post_limit=None, comment_limit=None, max_workers=None):
+    """
+    Streaming variant of fetch_posts(): yields each post dict as soon as its comments
+    and collector summary are ready (completion order, not listing order).
+    """
+    for _, post in _iter_fetched(subreddits, keywords, post_limit or 2, comment_limit or 3, max_workers):
+        yield post
+
+
+@timed("fetch_posts")
+def fetch_posts(subreddits, keywords=None, post_limit=None, comment_limit=None, max_workers=None):
+    """
+    Fetch top posts and their top comments concurrently.
+    Comment trees and collector summaries run on a bounded worker pool, Reddit requests
+    are paced by `reddit_governor`, and results keep subreddit/listing order.
+    """
     try:
         post_limit = post_limit or 2
         comment_limit = comment_limit or 3
 
-        for subreddit in subreddits:
-            top_posts = reddit_toolkit.reddit.subreddit(subreddit).top(limit=post_limit)
-            for post in top_posts:
-                post.comments.replace_more(limit=0)
-                all_comments = post.comments.list()
-
-                
-                filtered_comments = [
-                    {"Comment Body": c.body, "Upvotes": getattr(c, "score", 0)}
-                    for c in all_comments
-                    if not keywords or any(kw.lower() in c.body.lower() for kw in keywords)
-                ]
-
-              
-                sorted_comments = sorted(filtered_comments, key=lambda x: x["Upvotes"], reverse=True)
-
-                
-                post_comments = sorted_comments[:comment_limit]
-
-                print(f"DEBUG: Post: {post.title}, Top Comments Fetched: {len(post_comments)}")
-
-                try:
-                    comments_text = "\n".join(
-                        [f"{i+1}. {c['Comment Body']}" for i, c in enumerate(post_comments)]
-                    )
-                    prompt = f"Subreddit: {subreddit}\nPost: {post.title}\nComments:\n{comments_text}"
-                    collector_summary = collector_agent.step(prompt)
-                    collector_text = collector_summary.msgs[0].content.strip()
-                except Exception:
-                    collector_text = "Collector agent failed"
-
-                raw_data.append({
-                    "Subreddit": subreddit,
-                    "Post Title": post.title,
-                    "Post Body": getattr(post, "selftext", "") or "",
-                    "Post Link": f"https://reddit.com{post.permalink}",
-                    "Post Upvotes": getattr(post, "score", 0),
-                    "Post Thumbnail": post.thumbnail if hasattr(post, "thumbnail") and post.thumbnail.startswith("http") else None,
-                    "Collector Summary": collector_text,
-                    "Comments": post_comments
-                })
-                time.sleep(1)
+        fetched = dict(_iter_fetched(subreddits, keywords, post_limit, comment_limit, max_workers))
+        raw_data = [fetched[index] for index in sorted(fetched)]
 
         print(f"DEBUG: Total Posts Fetched: {len(raw_data)}")
         return raw_data
     except Exception as e:
+        metrics.incr("fetch_errors")
         print("Exception in fetch_posts():", e)
         traceback.print_exc()
         return []
 
 
 # ---------------- Generate Report ---------------- #
-def generate_report(posts_data):
-    report = []
-    for post in posts_data:
-        for comment in post.get("Comments", []):
-            body = comment.get("Comment Body", "")
-            sentiment_score = 0.0
-            verdict = "Unverified"
+def _normalize_verdict(value):
+    for verdict in VERDICTS:
+        if str(value).strip().strip(".'\"").lower() == verdict.lower():
+            return verdict
+    return None
 
-            try:
-                sentiment_resp = sentiment_agent.step(
-                    f"Analyze sentiment (positive=1, neutral=0, negative=-1). Comment: {body}"
-                )
-                sentiment_score = float(sentiment_resp.msgs[0].content.strip())
-            except Exception as e:
-                print("Error in sentiment analysis:", e)
-                traceback.print_exc()
 
+def _parse_sentiment(value):
+    try:
+        return float(str(value).strip().strip(".'\""))
+    except ValueError:
+        return None
+
+
+def _analyze_comment(body, local_score=None, has_claim=True):
+    sentiment_score = 0.0 if local_score is None else local_score
+    verdict = "Unverified" if has_claim else NO_CLAIM
+
+    if local_score is None:
+        try:
+            prefix = "Analyze sentiment (positive=1, neutral=0, negative=-1). Comment: "
+            reply = _agent_step(
+                "sentiment", prefix + _fit("sentiment", prefix, [body])[0],
+                validate=lambda r: _parse_sentiment(r) is not None,
+            )
+            parsed = _parse_sentiment(reply)
+            if parsed is None:
+                raise ValueError(f"could not parse sentiment from {reply!r}")
+            sentiment_score = parsed
+        except Exception as e:
+            metrics.incr("sentiment_errors")
+            print("Error in sentiment analysis:", e)
+            traceback.print_exc()
+
+    if has_claim:
+        try:
+            prefix = "Fact check this comment. Respond only with True, False, or Unverified:\n"
+            reply = _agent_step(
+                "factchecker", prefix + _fit("factchecker", prefix, [body])[0],
+                validate=lambda r: _normalize_verdict(r) is not None,
+            )
+            verdict = _normalize_verdict(reply) or "Unverified"
+        except Exception as e:
+            metrics.incr("factcheck_errors")
+            print("Error in fact checking:", e)
+            traceback.print_exc()
+
+    return sentiment_score, verdict
+
+
+def _parse_batch_response(text, ids):
+    """
+    Extract {id: (sentiment, verdict)} from a batch reply, skipping malformed items.
+    Accepts a JSON array, optionally wrapped in prose/code fences, or loose JSON objects.
+    """
+    candidates = []
+    match = re.search(r"\[.*\]", text, re.S)
+    if match:
+        try:
+            candidates = json.loads(match.group(0))
+        except ValueError:
+            candidates = []
+    if not isinstance(candidates, list) or not candidates:
+        candidates = []
+        for obj in re.findall(r"\{[^{}]*\}", text):
             try:
-                fact_resp = factchecker_agent.step(
-                    f"Fact check this comment. Respond only with True, False, or Unverified:\n{body}"
+                candidates.append(json.loads(obj))
+            except ValueError:
+                continue
+
+    results = {}
+    for item in candidates:
+        if not isinstance(item, dict):
+            continue
+        try:
+            item_id = int(item["id"])
+            sentiment_score = float(item["sentiment"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        verdict = _normalize_verdict(item.get("verdict"))
+        if item_id in ids and verdict:
+            results[item_id] = (max(-1.0, min(1.0, sentiment_score)), verdict)
+    return results
+
+
+def _analyze_batch(bodies):
+    """Score a batch of comments in one request; only unparsed items are retried."""
+    results = {}
+    pending = list(range(len(bodies)))
+    for attempt in range(ANALYSIS_MAX_RETRIES + 1):
+        if not pending:
+            break
+        if attempt:
+            metrics.incr("analysis_batch_retries")
+            metrics.incr("analysis_items_retried", len(pending))
+        # The empty JSON skeleton counts as fixed text, so ids, keys and quoting are budgeted.
+        skeleton = json.dumps([{"id": i, "text": ""} for i in pending])
+        texts = _fit("analysis", "Analyze these comments:\n" + skeleton, [bodies[i] for i in pending])
+        payload = json.dumps([{"id": i, "text": text} for i, text in zip(pending, texts)], ensure_ascii=False)
+        ids = set(pending)
+        try:
+            # Only a reply that covers the whole batch is cached; retries bypass the cache,
+            # which would otherwise hand back the same unparseable reply.
+            reply = _agent_step(
+                "analysis", f"Analyze these comments:\n{payload}", use_cache=not attempt, structured=True,
+                validate=lambda r: len(_parse_batch_response(r, ids)) == len(ids),
+            )
+            results.update(_parse_batch_response(reply, ids))
+        except Exception as e:
+            metrics.incr("analysis_errors")
+            print("Error in batch analysis:", e)
+            traceback.print_exc()
+        pending = [i for i in pending if i not in results]
+
+    metrics.incr("analysis_items_defaulted", len(pending))
+    for i in pending:
+        results[i] = (0.0, "Unverified")
+    return [results[i] for i in range(len(bodies))]
+
+
+def _analyze_bodies(bodies, batch_size, confidence_threshold, claim_min_score=None):
+    """(sentiment, verdict, sentiment tier) for each body."""
+    local_scores = triage_sentiment(bodies, confidence_threshold)
+    has_claims = detect_claims(bodies, claim_min_score)
+    metrics.incr("claim_filter_checked", len(bodies))
+    metrics.incr("claim_filter_skipped", has_claims.count(False))
+
+    if batch_size > 1:
+        # Comments with a local sentiment score and no claim need no LLM call at all.
+        analyses = [(local, NO_CLAIM) for local in local_scores]
+        pending = [i for i, (local, claim) in enumerate(zip(local_scores, has_claims)) if local is None or claim]
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            for i, (sentiment_score, verdict) in zip(chunk, _analyze_batch([bodies[i] for i in chunk])):
+                analyses[i] = (
+                    sentiment_score if local_scores[i] is None else local_scores[i],
+                    verdict if has_claims[i] else NO_CLAIM,
                 )
-                verdict = fact_resp.msgs[0].content.strip() if fact_resp.msgs else "Unverified"
-            except Exception as e:
-                print("Error in fact checking:", e)
-                traceback.print_exc()
-
-            report.append({
-                "Subreddit": post.get("Subreddit"),
-                "Post Title": post.get("Post Title"),
-                "Post Link": post.get("Post Link"),
-                "Post Upvotes": post.get("Post Upvotes", 0),
-                "Collector Summary": post.get("Collector Summary", ""),
-                "Comment": body,
-                "Comment Upvotes": comment.get("Upvotes", 0),
-                "Sentiment": sentiment_score,
-                "Fact Verdict": verdict
-            })
+    else:
+        analyses = [
+            _analyze_comment(body, local, claim)
+            for body, local, claim in zip(bodies, local_scores, has_claims)
+        ]
+
+    return [
+        (sentiment_score, verdict, TIER_LLM if local is None else TIER_LOCAL)
+        for (sentiment_score, verdict), local in zip(analyses, local_scores)
+    ]
+
+
+@timed("generate_report")
+def generate_report(posts_data, batch_size=None, confidence_threshold=None, dedup=None, dedup_threshold=None,
+                    claim_min_score=None, known=None):
+    """
+    Build one report row per comment.
+    Sentiment is scored locally first; only comments below `confidence_threshold`
+    (default SENTIMENT_CONFIDENCE_THRESHOLD) use the LLM score. "Sentiment Tier" records which.
+    batch_size > 1 packs that many comments into each sentiment + fact-check request;
+    batch_size = 1 uses separate sentiment_agent / factchecker_agent calls per comment.
+    With dedup (default DEDUP_ENABLED), exact and near-duplicate comments (similarity >=
+    dedup_threshold) are analyzed once and share the result; "Cluster ID" links them
+    (dedup.cluster_key of the representative, so IDs are comparable across runs).
+    Comments without a checkable claim (claims.claim_score below claim_min_score, default
+    CLAIM_MIN_SCORE) get the verdict "No claim" and skip the fact-checker.
+    known: optional {cluster key: analysis} shared across calls (see iter_report); clusters
+    with a member already in it reuse that analysis and Cluster ID, new ones are added.
+    """
+    batch_size = batch_size or ANALYSIS_BATCH_SIZE
+    dedup = DEDUP_ENABLED if dedup is None else dedup
+    items = [(post, comment) for post in posts_data for comment in post.get("Comments", [])]
+    bodies = [comment.get("Comment Body", "") for _, comment in items]
+
+    if dedup:
+        cluster_ids, representatives = cluster_comments(bodies, dedup_threshold)
+    else:
+        cluster_ids, representatives = list(range(len(bodies))), list(range(len(bodies)))
+    cluster_keys = [cluster_key(bodies[i]) for i in representatives]
+
+    if dedup and known is not None:
+        # An exact (normalized) duplicate of an earlier call's comment reuses its analysis.
+        for i, body in enumerate(bodies):
+            key = cluster_key(body)
+            if key in known and cluster_keys[cluster_ids[i]] not in known:
+                cluster_keys[cluster_ids[i]] = key
+    pending = [c for c, key in enumerate(cluster_keys) if known is None or key not in known]
+    metrics.incr("dedup_known_clusters", len(cluster_keys) - len(pending))
+    analyzed = _analyze_bodies(
+        [bodies[representatives[c]] for c in pending], batch_size, confidence_threshold, claim_min_score
+    )
+    cluster_analyses = [None] * len(cluster_keys)
+    for c, analysis in zip(pending, analyzed):
+        cluster_analyses[c] = analysis
+    for c, key in enumerate(cluster_keys):
+        if cluster_analyses[c] is None:
+            cluster_analyses[c] = known[key]
+        elif known is not None and dedup:
+            known[key] = cluster_analyses[c]
+
+    report = []
+    for (post, comment), body, cluster_id in zip(items, bodies, cluster_ids):
+        sentiment_score, verdict, tier = cluster_analyses[cluster_id]
+        report.append({
+            "Subreddit": post.get("Subreddit"),
+            "Post Title": post.get("Post Title"),
+            "Post Link": post.get("Post Link"),
+            "Post Upvotes": post.get("Post Upvotes", 0),
+            "Collector Summary": post.get("Collector Summary", ""),
+            "Comment": body,
+            "Comment Upvotes": comment.get("Upvotes", 0),
+            "Sentiment": sentiment_score,
+            "Sentiment Tier": tier,
+            "Fact Verdict": verdict,
+            "Cluster ID": cluster_keys[cluster_id]
+        })
     return report
 
+
+def iter_report(posts, batch_size=None, confidence_threshold=None):
+    """
+    Streaming variant of generate_report(): consumes posts from any iterable (e.g. iter_posts)
+    and yields report rows as soon as enough comments are buffered to fill one batch.
+    Duplicates are tracked across buffers: a comment already analyzed in an earlier buffer
+    reuses that result and Cluster ID instead of being analyzed again.
+    """
+    batch_size = batch_size or ANALYSIS_BATCH_SIZE
+    known = {}
+    buffered, buffered_comments = [], 0
+    for post in posts:
+        buffered.append(post)
+        buffered_comments += len(post.get("Comments", []))
+        if buffered_comments >= batch_size:
+            yield from generate_report(buffered, batch_size, confidence_threshold, known=known)
+            buffered, buffered_comments = [], 0
+    if buffered:
+        yield from generate_report(buffered, batch_size, confidence_threshold, known=known)
+
+
+def _posting_client():
+    return _reddit_override or get_reddit()
+
+
+def _submit(subreddit, title, body, flair_text=None):
+    """Submit one self-post; raises on failure. Flair ids come from the cached index."""
+    client = _posting_client()
+    subreddit_obj = client.subreddit(subreddit)
+    flair_id = None
+    if flair_text:
+        flair_id = flair_cache.lookup(
+            subreddit, flair_text,
+            lambda: _reddit_call(lambda: list(subreddit_obj.flair.link_templates), client=client),
+        )
+    # Paced but never retried here: a failed submit may still have created the post.
+    reddit_governor.acquire()
+    with metrics.reddit_request():
+        return subreddit_obj.submit(title=title, selftext=body, flair_id=flair_id)
+
+
+@timed("create_post")
 def create_post(subreddit, title, body, flair_text=None):
     """
     Create a new Reddit post based on user input using PRAW.
     flair_text: optional, required by some subreddits
     """
     try:
-        subreddit_obj = reddit.subreddit(subreddit)
-        
-        if flair_text:
-            flair_id = None
-            for ft in subreddit_obj.flair.link_templates:
-                if ft['text'].lower() == flair_text.lower():
-                    flair_id = ft['id']
-                    break
-            submission = subreddit_obj.submit(title=title, selftext=body, flair_id=flair_id)
-        else:
-            submission = subreddit_obj.submit(title=title, selftext=body)
-        
+        submission = _submit(subreddit, title, body, flair_text)
         print(f"✅ Post created: https://reddit.com{submission.permalink}")
         return submission
     except Exception as e:
+        metrics.incr("post_errors")
         print("❌ Error while posting:", e)
         return None
+
+
+@timed("create_posts")
+def create_posts(posts, max_retries=None, on_result=None):
+    """
+    Submit many posts in order through one queue paced by reddit_governor.
+    posts: dicts with subreddit, title, body and optional flair_text.
+    When Reddit rejects a submit as rate-limited (RATELIMIT / HTTP 429), posting pauses
+    for the wait Reddit asks for and the post goes to the back of the queue, up to
+    max_retries (default POST_MAX_RETRIES) times. Other errors are not retried, since
+    the post may already exist.
+    Returns one result per post, in input order: {"index", "subreddit", "title",
+    "status": "posted" | "failed", "url", "error", "attempts"}; on_result(result) is
+    called as each one completes.
+    """
+    max_retries = POST_MAX_RETRIES if max_retries is None else max_retries
+    results = [None] * len(posts)
+    attempts = [0] * len(posts)
+    queue = deque(range(len(posts)))
+    resume_at = 0.0
+
+    while queue:
+        delay = resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        index = queue.popleft()
+        post = posts[index]
+        attempts[index] += 1
+        try:
+            submission = _submit(post["subreddit"], post["title"], post.get("body", ""), post.get("flair_text"))
+            result = {"status": "posted", "url": f"https://reddit.com{submission.permalink}", "error": None}
+        except Exception as e:
+            retry_delay = submit_retry_delay(e)
+            if retry_delay is not None and attempts[index] <= max_retries:
+                metrics.incr("post_retries")
+                print(f"Rate limited posting to r/{post['subreddit']}, retrying in {retry_delay:.0f}s")
+                resume_at = time.monotonic() + retry_delay
+                queue.append(index)
+                continue
+            metrics.incr("post_errors")
+            result = {"status": "failed", "url": None, "error": str(e)}
+        result.update(index=index, subreddit=post["subreddit"], title=post["title"], attempts=attempts[index])
+        results[index] = result
+        if on_result:
+            on_result(result)
+    return results
+
+
+# ---------------- Backwards-compatible module attributes ---------------- #
+# `agents.model`, `agents.reddit`, `agents.collector_agent`, ... still work but are
+# built on first access instead of at import time.
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "reddit_toolkit": get_reddit_toolkit,
+    "reddit": get_reddit,
+    **{f"{name}_agent": (lambda name=name: _main_agent(name)) for name in AGENT_PROMPTS},
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,15 @@
 import streamlit as st
 import pandas as pd
-from agents import fetch_posts, generate_report, create_post, generate_comment_from_best
+from agents import fetch_posts, iter_posts, iter_report, create_post, generate_comment_from_best
+from agents import get_model, get_reddit_toolkit, get_reddit
+import time
+from snapshots import snapshot_store, snapshot_key
+from metrics import metrics, start_metrics_server
+from jobqueue import job_queue
+from worker import enqueue_analysis
+from report_store import ReportStore
+from prefetch import prefetcher, query_popularity, PREFETCH_ENABLED
+import json
 from dotenv import load_dotenv
 import os
 import traceback
@@ -11,6 +20,42 @@ if not os.path.exists(dotenv_path):
     st.error(f".env file not found at {dotenv_path}")
 load_dotenv(dotenv_path)
 
+# Optional Prometheus endpoint for scrapers (one per process).
+if os.getenv("METRICS_PORT"):
+    start_metrics_server(int(os.getenv("METRICS_PORT")))
+
+# ---------------- Shared clients ---------------- #
+# Built on first use, once per server process, and shared by every session. Read-only
+# analysis never needs the posting credentials.
+@st.cache_resource(show_spinner="Connecting to OpenAI and Reddit...")
+def analysis_clients():
+    return get_model(), get_reddit_toolkit()
+
+
+@st.cache_resource(show_spinner="Logging in to Reddit...")
+def posting_client():
+    return get_reddit()
+
+
+@st.cache_resource
+def prefetch_scheduler():
+    """Background refresh of popular queries, started once per server process."""
+    return prefetcher.start()
+
+# ---------------- Fetch Snapshots ---------------- #
+def session_snapshot(key):
+    """This session's last snapshot, if it matches `key` and is still fresh."""
+    snapshot = st.session_state.get("snapshot")
+    if snapshot is not None and snapshot.key == key and snapshot.age <= snapshot_store.ttl:
+        return snapshot
+    return None
+
+
+def remember_snapshot(key, posts, report=None):
+    snapshot = snapshot_store.put(key, posts, report)
+    st.session_state["snapshot"] = snapshot
+    return snapshot
+
 # ---------------- Streamlit Page Config ---------------- #
 st.set_page_config(
     page_title="https://FactCheck-agent.com", 
@@ -92,6 +137,12 @@ with st.sidebar:
         help="Number of top comments to analyze per post"
     )
 
+    use_workers = st.checkbox(
+        "Analyze on background workers",
+        value=os.getenv("ANALYSIS_QUEUE", "0") == "1",
+        help="Queue the analysis for `python worker.py` processes instead of running it in this session"
+    )
+
     st.markdown("---")
     st.subheader("✍️ Custom Post to Reddit")
 
@@ -109,6 +160,7 @@ with st.sidebar:
             st.error("Please fill all fields to post.")
         else:
             try:
+                posting_client()
                 submission = create_post(custom_subreddit, custom_title, custom_body, flair_text=custom_flair)
                 if submission:
                     st.success(f"Post created successfully! [View Post](https://reddit.com{submission.permalink})")
@@ -132,12 +184,16 @@ with st.sidebar:
 
     if gen_comment_btn:
         try:
-            posts_data_for_comment = fetch_posts(
-                [s.strip() for s in subreddits_input.split(",") if s.strip()],
-                [k.strip() for k in keywords_input.split(",") if k.strip()],
-                post_limit,
-                comment_limit
-            )
+            comment_subreddits = [s.strip() for s in subreddits_input.split(",") if s.strip()]
+            comment_keywords = [k.strip() for k in keywords_input.split(",") if k.strip()]
+            key = snapshot_key(comment_subreddits, comment_keywords, post_limit, comment_limit)
+            # Reuse the posts from the last analysis; only fetch when nothing is cached.
+            snapshot = session_snapshot(key) or snapshot_store.get(key)
+            if snapshot is None:
+                analysis_clients()
+                fetched = fetch_posts(comment_subreddits, comment_keywords, post_limit, comment_limit)
+                snapshot = remember_snapshot(key, fetched) if fetched else None
+            posts_data_for_comment = snapshot.posts if snapshot else []
             if not posts_data_for_comment or comment_post_index > len(posts_data_for_comment):
                 st.error("Invalid post index or no posts fetched!")
             else:
@@ -168,10 +224,106 @@ with st.sidebar:
     """)
 
 
+# ---------------- Post Card ---------------- #
+def render_post_card(post):
+    # Card layout
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    cols = st.columns([1, 3])  
+
+    # Thumbnail on left
+    with cols[0]:
+        if post.get("Post Thumbnail"):
+            st.image(post["Post Thumbnail"], use_container_width=True)
+        else:
+            st.image("https://www.redditinc.com/assets/images/site/reddit-logo.png", use_container_width=True)
+
+    # Title + Content on right
+    with cols[1]:
+        st.markdown(f"### 🔗 [{post.get('Post Title', 'No Title')}]({post.get('Post Link')})")
+        st.caption(f"r/{post.get('Subreddit', 'N/A')} • 👍 {post.get('Post Upvotes', 0)} upvotes")
+
+        # Post body preview
+        post_body = post.get("Post Body", "")
+        if post_body:
+            preview_text = post_body[:250] + "..." if len(post_body) > 250 else post_body
+            st.write(preview_text)
+
+            with st.expander("Read full post"):
+                st.write(post_body)
+
+        # Comments section
+        comments = post.get("Comments", [])
+        if comments:
+            st.markdown("**💬 Top Comments:**")
+            for j, comment in enumerate(comments[:3]):
+                comment_body = comment.get("Comment Body", "")
+                upvotes = comment.get("Upvotes", 0)
+                if len(comment_body) > 150:
+                    comment_body = comment_body[:150] + "..."
+                st.markdown(f"- {comment_body} (👍 {upvotes})")
+        else:
+            st.write("*No comments found*")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+# ---------------- Queued Analysis ---------------- #
+JOB_POLL_INTERVAL = 0.5       # seconds between progress checks
+JOB_IDLE_WARNING = 10         # seconds without any claimed task before warning
+JOB_STALL_TIMEOUT = int(os.getenv("JOB_STALL_TIMEOUT", "120"))   # stop waiting after this long without progress
+
+
+def poll_job(job_id, status_text, progress_bar, live_table):
+    """
+    Wait for a queued analysis job, rendering rows as workers finish tasks.
+    Returns (rows, finished). Waiting ends early, with the job left queued, when nothing
+    progresses for JOB_STALL_TIMEOUT seconds or the user clicks "Stop waiting".
+    """
+    rows, last_seq, started = ReportStore(), -1, time.monotonic()
+    warned = False
+    last_state, last_change = None, started
+    # Clicking reruns the script, which interrupts this loop; the job stays queued.
+    st.button("Stop waiting", key=f"stop_{job_id}", help="The job stays queued for the workers")
+    while True:
+        for seq, task_rows in job_queue.results(job_id, last_seq):
+            rows.extend(task_rows)
+            last_seq = seq
+        progress = job_queue.progress(job_id)
+        finished = progress["done"] + progress["failed"]
+        status_text.text(f"Workers finished {finished}/{progress['total']} batches "
+                         f"({progress['running']} running, {progress['queued']} queued)")
+        progress_bar.progress(50 + int(49 * finished / max(progress["total"], 1)))
+        if rows:
+            live_table.dataframe(rows.to_frame(), use_container_width=True, height=400)
+        if progress["finished"]:
+            break
+        now = time.monotonic()
+        if (finished, progress["running"]) != last_state:
+            last_state, last_change = (finished, progress["running"]), now
+        elif now - last_change > JOB_STALL_TIMEOUT:
+            return rows, False
+        idle = progress["queued"] == progress["total"]
+        if idle and not warned and now - started > JOB_IDLE_WARNING:
+            st.warning("No worker has picked up this job yet. Start one with `python worker.py`.")
+            warned = True
+        time.sleep(JOB_POLL_INTERVAL)
+    for seq, error in job_queue.errors(job_id):
+        st.error(f"Batch {seq + 1} failed: {error}")
+    return rows, True
+
+
 # ---------------- Analysis Button ---------------- #
-analyze_btn = st.button("Start Analysis", type="primary")
+analyze_col, refresh_col = st.columns([3, 1])
+with analyze_col:
+    analyze_btn = st.button("Start Analysis", type="primary")
+with refresh_col:
+    refresh_btn = st.button("🔄 Refresh", help="Ignore cached results and refetch from Reddit")
 
-if analyze_btn:
+if st.session_state.get("pending_jobs") and not (analyze_btn or refresh_btn):
+    st.info("An analysis job is still queued for the background workers. Click Start Analysis with the "
+            "same settings to collect its results.")
+
+if analyze_btn or refresh_btn:
     subreddits = [s.strip() for s in subreddits_input.split(",") if s.strip()]
     keywords = [k.strip() for k in keywords_input.split(",") if k.strip()]
 
@@ -183,123 +335,219 @@ if analyze_btn:
         st.error("Please enter at least one valid keyword!")
         st.stop()
 
+    # Per-run instrumentation; end a run left open by an earlier st.stop().
+    if st.session_state.get("run_metrics") is not None:
+        metrics.end_run(st.session_state["run_metrics"])
+    run_metrics = st.session_state["run_metrics"] = metrics.start_run()
+
     progress_bar = st.progress(0)
     status_text = st.empty()
-
-    with st.spinner("Connecting to Reddit API..."):
-        posts_data = []
+    cards_area = st.container()
+    results_area = st.container()
+    live_table = st.empty()
+
+    key = snapshot_key(subreddits, keywords, post_limit, comment_limit)
+    if refresh_btn:
+        snapshot_store.invalidate(key)
+        st.session_state.pop("snapshot", None)
+    query_popularity.record(key)
+    snapshot = session_snapshot(key) or snapshot_store.get(key)
+    if snapshot is None:
+        try:
+            analysis_clients()
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+    if PREFETCH_ENABLED:
+        prefetch_scheduler()
+
+    # Fetch and analysis are streamed: cards and table rows appear as each post is ready.
+    expected_posts = len(snapshot.posts) if snapshot else len(subreddits) * post_limit
+    fetched_count = 0
+    analyzed_links = set()
+    posts_data = []
+    report = ReportStore()
+
+    def update_progress():
+        done = fetched_count + len(analyzed_links)
+        progress_bar.progress(min(99, int(100 * done / (2 * expected_posts))))
+
+    def stream_posts(source):
+        global fetched_count
+        for post in source:
+            posts_data.append(post)
+            fetched_count += 1
+            if fetched_count <= 3:
+                try:
+                    with cards_area:
+                        render_post_card(post)
+                except Exception as e:
+                    print(f"Error displaying post {fetched_count}:", e)
+                    traceback.print_exc()
+            status_text.text(f"Fetched {fetched_count}/{expected_posts} posts, analyzing content...")
+            update_progress()
+            yield post
+
+    if snapshot and snapshot.report is not None:
+        for _ in stream_posts(snapshot.posts):
+            pass
+        report = snapshot.report if isinstance(snapshot.report, ReportStore) else ReportStore(snapshot.report)
+        freshness = "🟢" if snapshot.age < snapshot_store.ttl / 2 else "🟡"
+        origin = "prefetched in the background" if snapshot.source == "prefetch" else "fetched"
+        st.info(f"Showing results {origin} {int(snapshot.age // 60)} min {int(snapshot.age % 60)}s ago. "
+                f"Use Refresh to refetch from Reddit.", icon=freshness)
+    else:
+        status_text.text("Fetching posts from Reddit...")
+        source = snapshot.posts if snapshot else iter_posts(subreddits, keywords, post_limit, comment_limit)
         try:
-            status_text.text("Fetching posts from Reddit...")
-            posts_data = fetch_posts(subreddits, keywords, post_limit, comment_limit)
-            progress_bar.progress(50)
+            if use_workers:
+                with st.spinner("Fetching Reddit posts..."):
+                    queued_posts = list(stream_posts(source))
+                # A job from an earlier run that stopped waiting is picked up again, as long as
+                # its posts are still the snapshot being shown; Refresh or a refetch re-queues.
+                pending_jobs = st.session_state.setdefault("pending_jobs", {})
+                job_id = pending_jobs.get(key) if snapshot is not None else None
+                if job_id is None or not job_queue.progress(job_id)["total"]:
+                    job_id = enqueue_analysis(job_queue, queued_posts, meta={"subreddits": subreddits, "keywords": keywords})
+                    pending_jobs[key] = job_id
+                    remember_snapshot(key, queued_posts)
+                report, job_finished = poll_job(job_id, status_text, progress_bar, live_table)
+                if not job_finished:
+                    st.info(f"No progress for {JOB_STALL_TIMEOUT}s, so this page stopped waiting. The job stays "
+                            f"queued: start a worker with `python worker.py`, then click Start Analysis again "
+                            f"to collect the results.")
+                    st.stop()
+                pending_jobs.pop(key, None)
+                analyzed_links.update(report.posts["Post Link"])
+            else:
+                with st.spinner("Fetching and analyzing Reddit posts..."):
+                    last_render = 0.0
+                    for row in iter_report(stream_posts(source)):
+                        report.append(row)
+                        analyzed_links.add(row["Post Link"])
+                        update_progress()
+                        if time.monotonic() - last_render > 0.5:
+                            live_table.dataframe(report.to_frame(), use_container_width=True, height=400)
+                            last_render = time.monotonic()
         except Exception as e:
-            st.error("Error fetching posts! Check terminal for details.")
+            st.error("Error fetching or analyzing posts! Check terminal for details.")
             st.error(f"Error: {str(e)}")
-            print("Exception in fetch_posts():", e)
+            print("Exception in analysis pipeline:", e)
             traceback.print_exc()
             st.stop()
 
-    if not posts_data:
+        if posts_data:
+            remember_snapshot(key, posts_data, report)
+
+    if not fetched_count:
         st.warning("No posts fetched. Check your API credentials or search parameters.")
         st.stop()
 
-    progress_bar.progress(75)
-    status_text.text("Analyzing content...")
-
-    st.success(f"Fetched {len(posts_data)} posts successfully")
-
-    for i, post in enumerate(posts_data[:3]):
-        try:
-            # Card layout
-            st.markdown('<div class="card">', unsafe_allow_html=True)
-            cols = st.columns([1, 3])  
-
-            # Thumbnail on left
-            with cols[0]:
-                if post.get("Post Thumbnail"):
-                    st.image(post["Post Thumbnail"], use_container_width=True)
-                else:
-                    st.image("https://www.redditinc.com/assets/images/site/reddit-logo.png", use_container_width=True)
-
-            # Title + Content on right
-            with cols[1]:
-                st.markdown(f"### 🔗 [{post.get('Post Title', 'No Title')}]({post.get('Post Link')})")
-                st.caption(f"r/{post.get('Subreddit', 'N/A')} • 👍 {post.get('Post Upvotes', 0)} upvotes")
-
-                # Post body preview
-                post_body = post.get("Post Body", "")
-                if post_body:
-                    preview_text = post_body[:250] + "..." if len(post_body) > 250 else post_body
-                    st.write(preview_text)
-
-                    with st.expander("Read full post"):
-                        st.write(post_body)
-
-                # Comments section
-                comments = post.get("Comments", [])
-                if comments:
-                    st.markdown("**💬 Top Comments:**")
-                    for j, comment in enumerate(comments[:3]):
-                        comment_body = comment.get("Comment Body", "")
-                        upvotes = comment.get("Upvotes", 0)
-                        if len(comment_body) > 150:
-                            comment_body = comment_body[:150] + "..."
-                        st.markdown(f"- {comment_body} (👍 {upvotes})")
-                else:
-                    st.write("*No comments found*")
+    progress_bar.progress(100)
+    status_text.text("Analysis complete")
 
-            st.markdown('</div>', unsafe_allow_html=True)
-        except Exception as e:
-            print(f"Error displaying post {i+1}:", e)
-            traceback.print_exc()
     try:
-        status_text.text("Generating analysis report...")
-        report_data = generate_report(posts_data)
-        progress_bar.progress(100)
-        status_text.text("Analysis complete")
-        
-        if report_data:
-            df = pd.DataFrame(report_data)
-            st.markdown("---")
-            st.subheader("Analysis Results")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Comments Analyzed", len(df))
-            with col2:
-                if "Sentiment" in df.columns:
-                    avg_sentiment = df["Sentiment"].mean()
-                    st.metric("Avg Sentiment", f"{avg_sentiment:.2f}")
-            with col3:
-                if "Fact Check" in df.columns:
-                    fact_check_counts = df["Fact Check"].value_counts()
-                    st.metric("Unique Claims", len(fact_check_counts))
-            st.write("### Detailed Results")
-            st.dataframe(df, use_container_width=True, height=400)
+        if len(report):
+            live_table.dataframe(report.to_frame(), use_container_width=True, height=400)
+            subreddit_summary = report.subreddit_summary()
+            with results_area:
+                st.success(f"Fetched {fetched_count} posts successfully")
+                st.markdown("---")
+                st.subheader("Analysis Results")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Comments Analyzed", len(report))
+                with col2:
+                    st.metric("Avg Sentiment", f"{report.comments['Sentiment'].mean():.2f}")
+                with col3:
+                    st.metric("Fact-Checked", f"{report.checked_share():.0%}")
+                st.write("### Per Subreddit")
+                st.dataframe(subreddit_summary, use_container_width=True)
+                with st.expander("Per post"):
+                    st.dataframe(report.post_summary(), use_container_width=True, hide_index=True)
+                st.write("### Detailed Results")
             st.write("### Charts")
             col1, col2 = st.columns(2)
             with col1:
-                if "Sentiment" in df.columns:
-                    st.write("Sentiment Distribution")
-                    sentiment_counts = df["Sentiment"].round(1).value_counts().sort_index()
-                    st.line_chart(sentiment_counts)
+                st.write("Sentiment Distribution")
+                st.bar_chart(report.sentiment_histogram())
             with col2:
-                if "Fact Check" in df.columns:
-                    st.write("Fact-Check Results")
-                    fact_check_counts = df["Fact Check"].value_counts()
-                    st.line_chart(fact_check_counts)
+                st.write("Fact-Check Results")
+                st.bar_chart(report.verdict_counts())
+            st.write("Upvote-weighted Sentiment by Subreddit")
+            st.bar_chart(subreddit_summary["Weighted Sentiment"])
             st.write("### Export Data")
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Download CSV Report",
-                data=csv,
-                file_name="reddit_analysis_report.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="Download CSV Report",
+                    data=report.to_frame().to_csv(index=False),
+                    file_name="reddit_analysis_report.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+            with col2:
+                st.download_button(
+                    label="Download Subreddit Summary",
+                    data=subreddit_summary.to_csv(),
+                    file_name="reddit_analysis_summary.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
         else:
+            live_table.empty()
             st.info("No matching comments found for analysis.")
     except Exception as e:
         st.error("Error generating report! Check terminal for details.")
         st.error(f"Error: {str(e)}")
         print("Exception in generate_report():", e)
         traceback.print_exc()
+
+    metrics.end_run(run_metrics)
+    st.session_state["run_metrics"] = None
+    st.session_state["run_summary"] = run_metrics.summary()
+
+
+# ---------------- Performance Panel ---------------- #
+def render_performance_panel(summary):
+    with st.expander("⏱️ Performance", expanded=False):
+        col1, col2, col3, col4 = st.columns(4)
+        llm_stats = summary["llm"].values()
+        with col1:
+            st.metric("Wall time", f"{summary['wall_seconds']:.1f}s")
+        with col2:
+            st.metric("Reddit requests", summary["reddit"]["requests"])
+        with col3:
+            st.metric("LLM calls", sum(a["calls"] for a in llm_stats))
+        with col4:
+            st.metric("Cache hit rate", f"{summary['cache']['hit_rate']:.0%}")
+
+        checked = summary["events"].get("claim_filter_checked", 0)
+        if checked:
+            skipped = summary["events"].get("claim_filter_skipped", 0)
+            st.caption(f"Claim filter: {skipped}/{checked} comments ({skipped / checked:.0%}) had no "
+                       f"checkable claim and skipped the fact-checker")
+
+        if summary["stages"]:
+            st.write("Stages")
+            st.dataframe(pd.DataFrame(summary["stages"]).T, use_container_width=True)
+        if summary["llm"]:
+            st.write("LLM calls per agent")
+            st.dataframe(pd.DataFrame(summary["llm"]).T, use_container_width=True)
+        if summary["events"]:
+            st.write("Errors & retries")
+            st.json(summary["events"])
+
+        st.download_button(
+            label="Download run summary (JSON)",
+            data=json.dumps(summary, indent=2),
+            file_name="run_summary.json",
+            mime="application/json",
+            use_container_width=True
+        )
+        with st.expander("Prometheus metrics (process-wide)"):
+            st.code(metrics.to_prometheus(), language="text")
+
+
+if st.session_state.get("run_summary"):
+    render_performance_panel(st.session_state["run_summary"])
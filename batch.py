@@ -0,0 +1,336 @@
+"""
+Headless batch runner: fetch_posts -> generate_report for every subreddit in a job file,
+streaming rows to JSONL or chunked Parquet with resumable checkpoints. Does not import
+Streamlit.
+
+    python batch.py jobs.json --output nightly.jsonl --concurrency 4
+    python batch.py jobs.json --output nightly_parquet/ --format parquet --resume
+
+Job file (JSON):
+    {"defaults": {"keywords": ["AI"], "post_limit": 10, "comment_limit": 5},
+     "jobs": [{"subreddits": ["news", "science"]},
+              {"subreddits": ["india"], "keywords": ["elections"]}]}
+A bare list of jobs is accepted too.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import agents
+
+PARQUET_CHUNK_ROWS = 5000
+SPOOL_COPY_ROWS = 1000         # rows per write when copying a spooled unit into the output
+
+
+def load_units(path):
+    """Expand the job file into one work unit per (subreddit, keywords, limits)."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    defaults = {} if isinstance(spec, list) else spec.get("defaults", {})
+    jobs = spec if isinstance(spec, list) else spec.get("jobs", [])
+
+    units = []
+    for job in jobs:
+        job = dict(defaults, **job)
+        keywords = job.get("keywords") or []
+        for subreddit in job.get("subreddits", []):
+            unit = {
+                "subreddit": subreddit,
+                "keywords": keywords,
+                "post_limit": job.get("post_limit", 5),
+                "comment_limit": job.get("comment_limit", 3),
+            }
+            unit["id"] = f"{subreddit.lower()}|{','.join(sorted(k.lower() for k in keywords))}|{unit['post_limit']}|{unit['comment_limit']}"
+            units.append(unit)
+    return units
+
+
+class Checkpoint:
+    """Completed unit IDs plus the writer position they are durable up to."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {"done": [], "position": 0}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        self.done = set(self.data["done"])
+
+    def commit(self, unit_ids, position):
+        self.done.update(unit_ids)
+        self.data = {"done": sorted(self.done), "position": position}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+
+class JsonlWriter:
+    """Appends rows as they arrive; position is the byte offset of the last durable row."""
+
+    def __init__(self, path, resume_position=None):
+        self.path = path
+        mode = "r+" if resume_position is not None and os.path.exists(path) else "w"
+        self._file = open(path, mode, encoding="utf-8")
+        if mode == "r+":
+            # Drop rows written after the last checkpoint (unit was interrupted).
+            self._file.truncate(resume_position)
+            self._file.seek(resume_position)
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def mark(self):
+        self._file.flush()
+        return self._file.tell()
+
+    def rollback(self, mark):
+        """Drop everything written since mark()."""
+        self._file.flush()
+        self._file.truncate(mark)
+        self._file.seek(mark)
+
+    def sync(self):
+        """Flush and return the new durable position (None while rows are still buffered)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        position = self.sync()
+        self._file.close()
+        return position
+
+
+class ParquetWriter:
+    """Buffers up to chunk_rows rows and writes each chunk as part-NNNNN.parquet."""
+
+    def __init__(self, directory, resume_position=None, chunk_rows=PARQUET_CHUNK_ROWS):
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.parts = resume_position or 0
+        self._buffer = []
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            # Parts written after the last checkpoint belong to interrupted units.
+            if name.startswith("part-") and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(directory, name))
+
+    def write(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.chunk_rows:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._buffer:
+            return
+        table = pa.Table.from_pylist(self._buffer)
+        pq.write_table(table, os.path.join(self.directory, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+        self._buffer = []
+
+    def mark(self):
+        return self.parts, len(self._buffer)
+
+    def rollback(self, mark):
+        """Drop everything written since mark(), including parts flushed since then."""
+        import pyarrow.parquet as pq
+
+        parts, buffered = mark
+        if self.parts > parts:
+            # The first new part starts with the rows that were buffered at mark().
+            first = os.path.join(self.directory, f"part-{parts:05d}.parquet")
+            self._buffer = pq.read_table(first).slice(0, buffered).to_pylist()
+            for part in range(parts, self.parts):
+                os.remove(os.path.join(self.directory, f"part-{part:05d}.parquet"))
+            self.parts = parts
+        else:
+            del self._buffer[buffered:]
+
+    def sync(self):
+        return None if self._buffer else self.parts
+
+    def close(self):
+        self._flush()
+        return self.parts
+
+
+class UnitOutput:
+    """
+    Routes rows from concurrently running units to one writer, keeping each unit's rows
+    contiguous so the checkpoint position stays a clean cut. One unit at a time (the
+    owner) streams rows straight to the writer; the others spool theirs to temporary
+    files on disk and are copied in at unit boundaries. Completed units are checkpointed
+    when they are in the output; a failed owner's rows are rolled back.
+    """
+
+    def __init__(self, writer, checkpoint):
+        self.writer = writer
+        self.checkpoint = checkpoint
+        self._lock = threading.Lock()
+        self._owner = None
+        self._owner_mark = None
+        self._spools = {}      # unit id -> temporary file of JSON lines
+        self._finished = []    # spooled units that completed while another unit owned the output
+        self._unsynced = []
+
+    def write(self, unit_id, rows):
+        with self._lock:
+            if self._owner is None:
+                self._claim(unit_id)
+            if self._owner == unit_id:
+                self.writer.write(rows)
+                return
+            spool = self._spools.get(unit_id)
+            if spool is None:
+                spool = self._spools[unit_id] = tempfile.TemporaryFile("w+", encoding="utf-8")
+            for row in rows:
+                spool.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def finish(self, unit_id, ok):
+        with self._lock:
+            if self._owner == unit_id:
+                self._owner = None
+                if ok:
+                    self._commit(unit_id)
+                else:
+                    self.writer.rollback(self._owner_mark)
+            elif not ok:
+                spool = self._spools.pop(unit_id, None)
+                if spool is not None:
+                    spool.close()
+            else:
+                self._finished.append(unit_id)
+            if self._owner is None:
+                for finished in self._finished:
+                    self._copy_spool(finished)
+                    self._commit(finished)
+                self._finished = []
+
+    def close(self):
+        with self._lock:
+            position = self.writer.close()
+            if self._unsynced:
+                self.checkpoint.commit(self._unsynced, position)
+                self._unsynced = []
+
+    def _claim(self, unit_id):
+        self._owner = unit_id
+        self._owner_mark = self.writer.mark()
+        self._copy_spool(unit_id)
+
+    def _copy_spool(self, unit_id):
+        spool = self._spools.pop(unit_id, None)
+        if spool is None:
+            return
+        spool.seek(0)
+        rows = []
+        for line in spool:
+            rows.append(json.loads(line))
+            if len(rows) >= SPOOL_COPY_ROWS:
+                self.writer.write(rows)
+                rows = []
+        self.writer.write(rows)
+        spool.close()
+
+    def _commit(self, unit_id):
+        self._unsynced.append(unit_id)
+        position = self.writer.sync()
+        if position is not None:
+            self.checkpoint.commit(self._unsynced, position)
+            self._unsynced = []
+
+
+def run_unit(unit, output, workers=None):
+    """Stream the unit's report rows into `output` as they are produced; returns the row count."""
+    posts = agents.iter_posts([unit["subreddit"]], unit["keywords"], unit["post_limit"], unit["comment_limit"], workers)
+    rows = 0
+    for row in agents.iter_report(posts):
+        output.write(unit["id"], [row])
+        rows += 1
+    return rows
+
+
+def run(units, writer, checkpoint, concurrency=1, workers=None):
+    pending_units = [u for u in units if u["id"] not in checkpoint.done]
+    print(f"{len(units) - len(pending_units)} units already done, {len(pending_units)} to run", file=sys.stderr)
+    output = UnitOutput(writer, checkpoint)
+    rows_written, failures = 0, 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        queue = iter(pending_units)
+        running = {}
+        for unit in queue:
+            running[pool.submit(run_unit, unit, output, workers)] = unit
+            if len(running) >= concurrency:
+                break
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                unit = running.pop(future)
+                try:
+                    rows = future.result()
+                    output.finish(unit["id"], ok=True)
+                    rows_written += rows
+                    print(f"done r/{unit['subreddit']}: {rows} rows", file=sys.stderr)
+                except Exception as e:
+                    output.finish(unit["id"], ok=False)
+                    failures += 1
+                    print(f"failed r/{unit['subreddit']}: {e}", file=sys.stderr)
+                    traceback.print_exc()
+                next_unit = next(queue, None)
+                if next_unit is not None:
+                    running[pool.submit(run_unit, next_unit, output, workers)] = next_unit
+
+    output.close()
+    print(f"{rows_written} rows written, {failures} units failed", file=sys.stderr)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="job file (JSON)")
+    parser.add_argument("--output", required=True, help="JSONL file or Parquet directory")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default=None,
+                        help="default: parquet when --output ends with / or .parquet, else jsonl")
+    parser.add_argument("--concurrency", type=int, default=2, help="subreddits processed in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="fetch workers per subreddit")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="skip units recorded in the checkpoint")
+    parser.add_argument("--chunk-rows", type=int, default=PARQUET_CHUNK_ROWS, help="rows per Parquet part")
+    args = parser.parse_args()
+
+    output_format = args.format or (
+        "parquet" if args.output.endswith(("/", ".parquet")) else "jsonl"
+    )
+    checkpoint_path = args.checkpoint or f"{args.output.rstrip('/')}.checkpoint.json"
+    if not args.resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    position = checkpoint.data["position"] if args.resume else None
+
+    if output_format == "parquet":
+        writer = ParquetWriter(args.output, position, args.chunk_rows)
+    else:
+        writer = JsonlWriter(args.output, position)
+
+    failures = run(load_units(args.jobs), writer, checkpoint, args.concurrency, args.workers)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
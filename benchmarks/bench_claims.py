@@ -0,0 +1,123 @@
+"""
+Accuracy of the claim-worthiness filter (claims.py) on a small hand-labelled sample of
+Reddit-style comments: how many checkable claims still reach the fact-checker (recall),
+how many skipped comments really had nothing to check, and the share skipped.
+
+    python benchmarks/bench_claims.py
+    python benchmarks/bench_claims.py --thresholds 0.5 1 1.5 2 --show-errors
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from claims import CLAIM_MIN_SCORE, claim_score  # noqa: E402
+
+# Comments that make a checkable factual claim, true or false.
+CLAIMS = [
+    "Vaccines cause autism in kids",
+    "Biden won the 2020 election",
+    "The earth is flat and NASA lies",
+    "The moon landing was faked by the government",
+    "Trump never paid any taxes at all",
+    "5G towers spread the virus",
+    "Unemployment fell to 3.5% last year",
+    "The Eiffel Tower was built in 1889",
+    "Climate change is a hoax invented by China",
+    "Masks don't work against viruses at all",
+    "The bill passed the Senate 52 to 48",
+    "Apple is worth more than the entire UK stock market",
+    "Chemtrails are used to control the population",
+    "Ivermectin cures covid, doctors are hiding it",
+    "Bill Gates wants to put microchips in vaccines",
+    "According to the CDC, flu kills about 30k Americans a year",
+    "Crime has never been higher than it is now",
+    "The WHO declared the pandemic over in May 2023",
+    "Tesla sold 1.8 million cars in 2023",
+    "Fluoride in tap water lowers IQ",
+    "Microsoft bought GitHub for $7.5 billion",
+    "The election was rigged with fake ballots",
+    "Immigrants commit more crimes than citizens",
+    "Einstein failed math in school",
+    "Humans only use 10% of their brains",
+    "Wind turbines kill millions of birds every year",
+    "Canada banned handguns last year",
+    "The study found no link between coffee and cancer",
+    "Eating carrots improves your night vision",
+    "Russia owns more nuclear weapons than the US",
+]
+
+# Opinions, reactions, questions and jokes with nothing to fact-check.
+NON_CLAIMS = [
+    "lol same",
+    "This.",
+    "Source?",
+    "I think this is great honestly",
+    "Thanks for sharing this, really helpful!",
+    "What do you all think about this?",
+    "😂😂😂",
+    "Imagine being this wrong lmao",
+    "I love this community so much",
+    "Anyone else watching the game tonight?",
+    "Agreed, well said.",
+    "This made my day haha",
+    "I hope they fix this soon",
+    "Can someone explain what happened here?",
+    "Great post, thank you",
+    "I feel like nobody is talking about this",
+    "Wow what a time to be alive",
+    "Not sure how I feel about this tbh",
+    "Take my upvote and leave",
+    "Username checks out",
+    "Why would anyone do that?",
+    "In my opinion the sequel was better",
+    "Happy cake day!",
+    "Honestly I just want to sleep",
+    "Following for updates",
+    "omg the cat at the end",
+    "I wish I had seen this earlier",
+    "Oof, that's rough buddy",
+    "Okay but why is this so funny",
+    "Same here, can't wait for the weekend",
+]
+
+
+def evaluate(threshold):
+    claim_hits = sum(claim_score(text) >= threshold for text in CLAIMS)
+    false_hits = sum(claim_score(text) >= threshold for text in NON_CLAIMS)
+    skipped = len(CLAIMS) - claim_hits + len(NON_CLAIMS) - false_hits
+    correct = claim_hits + len(NON_CLAIMS) - false_hits
+    return {
+        "recall": claim_hits / len(CLAIMS),
+        "precision": claim_hits / (claim_hits + false_hits) if claim_hits + false_hits else 0.0,
+        "accuracy": correct / (len(CLAIMS) + len(NON_CLAIMS)),
+        "skipped": skipped / (len(CLAIMS) + len(NON_CLAIMS)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 1.0, 1.5, 2.0])
+    parser.add_argument("--show-errors", action="store_true", help="list misclassified comments at CLAIM_MIN_SCORE")
+    args = parser.parse_args()
+
+    print(f"{len(CLAIMS)} claims, {len(NON_CLAIMS)} non-claims; CLAIM_MIN_SCORE={CLAIM_MIN_SCORE}")
+    for threshold in sorted(set(args.thresholds) | {CLAIM_MIN_SCORE}):
+        result = evaluate(threshold)
+        marker = "*" if threshold == CLAIM_MIN_SCORE else " "
+        print(f"{marker} min_score={threshold:<4} claim recall={result['recall']:5.0%} "
+              f"precision={result['precision']:5.0%} accuracy={result['accuracy']:5.0%} "
+              f"skipped={result['skipped']:5.0%}")
+
+    if args.show_errors:
+        for text in CLAIMS:
+            if claim_score(text) < CLAIM_MIN_SCORE:
+                print(f"missed claim  {claim_score(text):5.2f}  {text}")
+        for text in NON_CLAIMS:
+            if claim_score(text) >= CLAIM_MIN_SCORE:
+                print(f"false claim   {claim_score(text):5.2f}  {text}")
+
+
+if __name__ == "__main__":
+    main()
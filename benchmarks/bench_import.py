@@ -0,0 +1,71 @@
+"""
+Import-time benchmark: wall time of `import agents` (and `import app`'s backend modules)
+in fresh interpreters, optionally against an older revision of the tree.
+
+    python benchmarks/bench_import.py --runs 10
+    python benchmarks/bench_import.py --runs 10 --baseline HEAD~1
+"""
+import os
+import sys
+import tarfile
+import tempfile
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Older revisions validate credentials at import time; placeholders let them import.
+PLACEHOLDER_ENV = {
+    var: "import-benchmark"
+    for var in ("OPENAI_API_KEY", "REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET",
+                "REDDIT_USER_AGENT", "REDDIT_USERNAME", "REDDIT_PASSWORD")
+}
+
+SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def time_import(tree, module, runs):
+    env = dict(os.environ, **PLACEHOLDER_ENV)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [tree, env.get("PYTHONPATH")]))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", SNIPPET.format(module=module)],
+                             cwd=tree, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise SystemExit(f"import {module} failed in {tree}:\n{out.stderr}")
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def export_revision(revision, directory):
+    archive = os.path.join(directory, "tree.tar")
+    subprocess.run(["git", "archive", "-o", archive, revision], cwd=ROOT, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(directory)
+    return directory
+
+
+def report(label, samples):
+    print(f"{label:<12} median={statistics.median(samples) * 1000:8.1f}ms "
+          f"min={min(samples) * 1000:8.1f}ms max={max(samples) * 1000:8.1f}ms")
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="agents")
+    parser.add_argument("--baseline", default=None, help="git revision to compare against")
+    args = parser.parse_args()
+
+    current = report("current", time_import(ROOT, args.module, args.runs))
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as directory:
+            tree = export_revision(args.baseline, directory)
+            baseline = report(args.baseline, time_import(tree, args.module, args.runs))
+        print(f"speedup      {baseline / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: old per-keyword substring filter + full sort vs. selection.py
+(compiled matcher + heap top-k) on synthetic comment trees.
+
+    python benchmarks/bench_selection.py --comments 50000 --keywords 8 --k 3
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selection import KeywordMatcher, select_top_comments  # noqa: E402
+
+WORDS = ("the market election model stock vote data policy people think really "
+         "great awful science climate news report source study claim because").split()
+
+
+class FakeComment:
+    def __init__(self, body, score):
+        self.body = body
+        self.score = score
+        self.replies = []
+
+
+class FakeForest(list):
+    def list(self):
+        # Same breadth-first flattening as praw's CommentForest.list()
+        out, queue = [], list(self)
+        while queue:
+            comment = queue.pop(0)
+            out.append(comment)
+            queue.extend(comment.replies)
+        return out
+
+
+def build_tree(n_comments, max_fanout=5, seed=0):
+    rng = random.Random(seed)
+    roots = FakeForest()
+    nodes = []
+    for _ in range(n_comments):
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60)))
+        comment = FakeComment(body, rng.randint(-20, 5000))
+        if nodes and rng.random() < 0.7:
+            parent = rng.choice(nodes[-200:])
+            if len(parent.replies) < max_fanout:
+                parent.replies.append(comment)
+            else:
+                roots.append(comment)
+        else:
+            roots.append(comment)
+        nodes.append(comment)
+    return roots
+
+
+def baseline(forest, keywords, k):
+    filtered = [
+        {"Comment Body": c.body, "Upvotes": getattr(c, "score", 0)}
+        for c in forest.list()
+        if not keywords or any(kw.lower() in c.body.lower() for kw in keywords)
+    ]
+    return sorted(filtered, key=lambda x: x["Upvotes"], reverse=True)[:k]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--keywords", type=int, default=6)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    forest = build_tree(args.comments)
+    keywords = [w.capitalize() for w in WORDS[-args.keywords:]]
+    matcher = KeywordMatcher(keywords)
+
+    base_time, base_result = timed(lambda: baseline(forest, keywords, args.k), args.repeat)
+    new_time, new_result = timed(lambda: select_top_comments(forest, matcher, args.k), args.repeat)
+    new_pairs = [(c["Comment Body"], c["Upvotes"]) for c in new_result]
+    base_pairs = [(c["Comment Body"], c["Upvotes"]) for c in base_result]
+    assert base_pairs == new_pairs, "selection engine disagrees with baseline"
+
+    print(f"comments={args.comments} keywords={args.keywords} k={args.k}")
+    print(f"baseline (lower/in + sort): {base_time * 1000:8.2f} ms")
+    print(f"selection (matcher + heap): {new_time * 1000:8.2f} ms")
+    print(f"speedup: {base_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Offline model backend for agents.set_agent_backend(): canned replies per agent with
+configurable latency, jitter and error rate. Records every call's latency.
+"""
+import re
+import json
+import time
+import random
+import threading
+
+
+class FakeModelError(Exception):
+    """Stands in for an API failure; status_code mimics an HTTP 429 rate limit."""
+
+    status_code = 429
+
+
+class FakeModelBackend:
+    model_id = "fake-model"
+
+    def __init__(self, latency=0.2, jitter=0.1, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self.call_latencies = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def step(self, name, system_prompt, prompt):
+        started = time.perf_counter()
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+        # Latency grows mildly with prompt size, like a real completion endpoint.
+        time.sleep(delay * (1 + len(prompt) / 20000))
+        try:
+            if fail:
+                with self._lock:
+                    self.errors += 1
+                raise FakeModelError("fake rate limit")
+            return self._reply(name, prompt)
+        finally:
+            with self._lock:
+                self.call_latencies.append(time.perf_counter() - started)
+
+    def _reply(self, name, prompt):
+        seed = sum(map(ord, prompt[-64:]))
+        if name == "sentiment":
+            return f"{(seed % 21 - 10) / 10:.1f}"
+        if name == "factchecker":
+            return ("True", "False", "Unverified")[seed % 3]
+        if name == "analysis":
+            ids = [int(i) for i in re.findall(r'"id":\s*(\d+)', prompt)]
+            return json.dumps([
+                {"id": i, "sentiment": ((seed + i) % 21 - 10) / 10, "verdict": ("True", "False", "Unverified")[(seed + i) % 3]}
+                for i in ids
+            ])
+        if name == "collector":
+            return "Collector Summary: synthetic discussion summary.\nOverall Discussion Tone: Mixed"
+        return "Synthetic generated comment."
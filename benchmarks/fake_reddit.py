@@ -0,0 +1,218 @@
+"""
+Offline PRAW stand-in: synthetic subreddits, posts and comment trees of configurable size,
+with optional per-request latency. Supports the calls the pipeline makes:
+subreddit(name).top/new/comments, post.comments (fetched on first access, as in PRAW),
+post.comments.replace_more/list, comment.replies,
+subreddit(name).flair.link_templates and subreddit(name).submit (with optional
+simulated RATELIMIT rejections).
+"""
+import time
+import random
+import threading
+
+WORDS = ("the market election model stock vote data policy people think really great awful "
+         "science climate news report source study claim because AI government percent million "
+         "announced says proves lol this agree wrong").split()
+
+
+class FakeComment:
+    def __init__(self, comment_id, body, score, created_utc, link_id):
+        self.id = comment_id
+        self.name = f"t1_{comment_id}"
+        self.body = body
+        self.score = score
+        self.created_utc = created_utc
+        self.link_id = link_id
+        self.replies = FakeCommentForest(None)
+
+
+class FakeCommentForest(list):
+    def __init__(self, client, comments=()):
+        super().__init__(comments)
+        self._client = client
+
+    def replace_more(self, limit=0):
+        # The tree is already loaded (see FakeSubmission.comments); like PRAW with
+        # limit=0, this makes no request.
+        return []
+
+    def list(self):
+        # Same breadth-first order as praw's CommentForest.list()
+        out, queue, head = [], list(self), 0
+        while head < len(queue):
+            comment = queue[head]
+            head += 1
+            out.append(comment)
+            queue.extend(comment.replies)
+        return out
+
+
+class FakeSubmission:
+    def __init__(self, client, subreddit, index, rng, comments_per_post, max_depth, created_utc):
+        self.id = f"{subreddit}{index}"
+        self.name = f"t3_{self.id}"
+        self.title = f"{subreddit} post {index}: " + " ".join(rng.choice(WORDS) for _ in range(8))
+        self.selftext = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 200)))
+        self.permalink = f"/r/{subreddit}/comments/{self.id}/"
+        self.score = rng.randint(0, 50000)
+        self.thumbnail = "self"
+        self.created_utc = created_utc
+        self._client = client
+        self._fetched = False
+        self._comments = FakeCommentForest(client, self._build_tree(rng, comments_per_post, max_depth))
+
+    @property
+    def comments(self):
+        # PRAW fetches the comment tree on first access of .comments; unsynchronized, so
+        # concurrent first accesses each make the request, as they do in PRAW.
+        if not self._fetched:
+            self._client._request()
+            self._fetched = True
+        return self._comments
+
+    def _build_tree(self, rng, n_comments, max_depth):
+        roots, nodes = [], []
+        for i in range(n_comments):
+            body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 80)))
+            comment = FakeComment(f"{self.id}_{i}", body, rng.randint(-20, 5000),
+                                  self.created_utc + i, self.name)
+            candidates = [(n, d) for n, d in nodes[-50:] if d < max_depth]
+            if candidates and rng.random() < 0.6:
+                parent, depth = rng.choice(candidates)
+                parent.replies.append(comment)
+                nodes.append((comment, depth + 1))
+            else:
+                roots.append(comment)
+                nodes.append((comment, 0))
+        return roots
+
+
+class FakeErrorItem:
+    def __init__(self, error_type, message):
+        self.error_type = error_type
+        self.message = message
+
+
+class FakeRedditAPIException(Exception):
+    """Mimics praw.exceptions.RedditAPIException: `items` carry error_type/message."""
+
+    def __init__(self, items):
+        super().__init__("; ".join(f"{i.error_type}: {i.message}" for i in items))
+        self.items = items
+
+
+class FakeFlair:
+    def __init__(self, client, subreddit):
+        self._client = client
+        self._subreddit = subreddit
+
+    @property
+    def link_templates(self):
+        self._client._request()
+        self._client.flair_requests += 1
+        return iter([
+            {"id": f"{self._subreddit}-{text.lower()}", "text": text, "mod_only": False}
+            for text in self._client.flair_texts
+        ])
+
+
+class FakeSubmissionStub:
+    """What submit() returns: enough of a Submission for create_post's callers."""
+
+    def __init__(self, post_id, subreddit, title, selftext, flair_id):
+        self.id = post_id
+        self.title = title
+        self.selftext = selftext
+        self.link_flair_template_id = flair_id
+        self.permalink = f"/r/{subreddit}/comments/{post_id}/"
+
+
+class FakeSubreddit:
+    def __init__(self, client, name):
+        self._client = client
+        self.display_name = name
+        self.flair = FakeFlair(client, name)
+
+    def submit(self, title, selftext="", flair_id=None, **kwargs):
+        return self._client._submit(self.display_name, title, selftext, flair_id)
+
+    def _posts(self, limit):
+        return [self._client._submission(self.display_name, i) for i in range(min(limit, self._client.posts_per_subreddit))]
+
+    def top(self, limit=100, **kwargs):
+        self._client._request()
+        return iter(sorted(self._posts(limit), key=lambda p: p.score, reverse=True))
+
+    def new(self, limit=100, **kwargs):
+        self._client._request()
+        return iter(sorted(self._posts(limit), key=lambda p: p.created_utc, reverse=True))
+
+    def comments(self, limit=100, **kwargs):
+        self._client._request()
+        comments = [c for p in self._posts(self._client.posts_per_subreddit) for c in p._comments.list()]
+        return iter(sorted(comments, key=lambda c: c.created_utc, reverse=True)[:limit])
+
+
+class FakeReddit:
+    """
+    posts_per_subreddit / comments_per_post / max_depth: synthetic data size
+    latency, jitter: seconds added to every listing / comment-tree request
+    flair_texts: link flair templates every subreddit offers
+    ratelimit_every: reject every Nth submit with RATELIMIT ("... 1 second ..."); 0 = never
+    Data is deterministic per (seed, subreddit, post index). Accepted submits are
+    recorded in `submissions`.
+    """
+
+    def __init__(self, posts_per_subreddit=20, comments_per_post=200, max_depth=6,
+                 latency=0.0, jitter=0.0, seed=0, flair_texts=("Discussion", "News", "Meta"),
+                 ratelimit_every=0, ratelimit_seconds=1):
+        self.posts_per_subreddit = posts_per_subreddit
+        self.comments_per_post = comments_per_post
+        self.max_depth = max_depth
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.requests = 0
+        self.flair_texts = tuple(flair_texts)
+        self.flair_requests = 0
+        self.ratelimit_every = ratelimit_every
+        self.ratelimit_seconds = ratelimit_seconds
+        self.submit_calls = 0
+        self.submissions = []
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _submission(self, subreddit, index):
+        key = (subreddit, index)
+        with self._lock:
+            if key not in self._cache:
+                rng = random.Random(f"{self.seed}:{subreddit}:{index}")
+                self._cache[key] = FakeSubmission(
+                    self, subreddit, index, rng, self.comments_per_post, self.max_depth,
+                    created_utc=1_700_000_000 + index * 3600,
+                )
+            return self._cache[key]
+
+    def _submit(self, subreddit, title, selftext, flair_id):
+        self._request()
+        with self._lock:
+            self.submit_calls += 1
+            if self.ratelimit_every and self.submit_calls % self.ratelimit_every == 0:
+                raise FakeRedditAPIException([FakeErrorItem(
+                    "RATELIMIT", f"Looks like you've been doing that a lot. Take a break for "
+                                 f"{self.ratelimit_seconds} second before trying again.",
+                )])
+            post_id = f"s{len(self.submissions)}"
+            submission = FakeSubmissionStub(post_id, subreddit, title, selftext, flair_id)
+            self.submissions.append(submission)
+            return submission
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name)
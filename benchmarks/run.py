@@ -0,0 +1,171 @@
+"""
+Offline benchmark scenarios for the fetch / analysis / end-to-end pipeline, using
+FakeReddit and FakeModelBackend (no Reddit or OpenAI credentials or network needed).
+Reports throughput, p50/p95/p99 latencies and peak memory, and writes them as JSON.
+
+    python benchmarks/run.py --scenario all --subreddits 4 --posts 10 --comments 300 \\
+        --model-latency 0.3 --output bench_results.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import agents  # noqa: E402
+from llm_cache import llm_cache  # noqa: E402
+from metrics import metrics  # noqa: E402
+from ratelimit import reddit_governor, model_governor  # noqa: E402
+from fake_reddit import FakeReddit  # noqa: E402
+from fake_model import FakeModelBackend  # noqa: E402
+
+SCENARIOS = ("fetch", "analysis", "end_to_end")
+
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+def measure(items, track_memory=True):
+    """Drain an iterator, timing each item's arrival (seconds since start)."""
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    arrivals = [time.perf_counter() - started for _ in items]
+    elapsed = time.perf_counter() - started
+    peak = None
+    if track_memory:
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return {
+        "items": len(arrivals),
+        "seconds": elapsed,
+        "throughput_per_s": len(arrivals) / elapsed if elapsed else None,
+        "time_to_first_item_s": arrivals[0] if arrivals else None,
+        "item_arrival_s": percentiles(arrivals),
+        "peak_memory_mb": peak,
+    }
+
+
+def run_scenario(name, args):
+    reddit = FakeReddit(args.posts, args.comments, args.depth, args.reddit_latency, args.reddit_jitter, args.seed)
+    model = FakeModelBackend(args.model_latency, args.model_jitter, args.error_rate, args.seed)
+    agents.set_reddit_client(reddit)
+    agents.set_agent_backend(model)
+    subreddits = [f"bench{i}" for i in range(args.subreddits)]
+    keywords = args.keywords
+
+    def posts():
+        return agents.iter_posts(subreddits, keywords, args.posts, args.comment_limit, args.workers)
+
+    if name == "fetch":
+        items = posts()
+    elif name == "analysis":
+        prefetched = agents.fetch_posts(subreddits, keywords, args.posts, args.comment_limit, args.workers)
+        reddit.requests = 0
+        model.calls, model.errors, model.call_latencies = 0, 0, []
+        items = agents.iter_report(prefetched, args.batch_size)
+    else:
+        items = agents.iter_report(posts(), args.batch_size)
+
+    with metrics.run() as run_metrics:
+        result = measure(items, not args.no_memory)
+    result.update({
+        "metrics": run_metrics.summary(),
+        "scenario": name,
+        "reddit_requests": reddit.requests,
+        "model_calls": model.calls,
+        "model_errors": model.errors,
+        "model_call_latency_s": percentiles(model.call_latencies),
+    })
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--subreddits", type=int, default=3)
+    parser.add_argument("--posts", type=int, default=10, help="posts per subreddit")
+    parser.add_argument("--comments", type=int, default=200, help="comments per post tree")
+    parser.add_argument("--depth", type=int, default=6, help="max reply depth")
+    parser.add_argument("--comment-limit", type=int, default=5, help="top comments kept per post")
+    parser.add_argument("--keywords", nargs="*", default=["AI", "market", "climate"])
+    parser.add_argument("--workers", type=int, default=None, help="fetch worker pool size")
+    parser.add_argument("--batch-size", type=int, default=None, help="comments per analysis request")
+    parser.add_argument("--reddit-latency", type=float, default=0.05)
+    parser.add_argument("--reddit-jitter", type=float, default=0.02)
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--model-jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pace", action="store_true", help="keep the Reddit/model rate governors on")
+    parser.add_argument("--cache", action="store_true", help="keep the on-disk LLM cache enabled")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows runs down)")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    if not args.pace:
+        reddit_governor.configure(None)
+        model_governor.configure(None)
+    if not args.cache:
+        llm_cache.enabled = False
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    results = []
+    for name in scenarios:
+        result = run_scenario(name, args)
+        results.append(result)
+        arrival = result["item_arrival_s"]
+        print(f"{name:<11} items={result['items']:<6} {result['seconds']:7.2f}s "
+              f"{result['throughput_per_s'] or 0:8.1f}/s  first={result['time_to_first_item_s'] or 0:.2f}s "
+              f"p50={arrival.get('p50', 0):.2f}s p95={arrival.get('p95', 0):.2f}s p99={arrival.get('p99', 0):.2f}s "
+              f"model_calls={result['model_calls']} peak={result['peak_memory_mb'] or 0:.1f}MB")
+
+    agents.set_reddit_client(None)
+    agents.set_agent_backend(None)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
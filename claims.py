@@ -0,0 +1,112 @@
+import os
+import re
+
+# ---------------- Claim-worthiness filter ---------------- #
+# Comments scoring below this are marked NO_CLAIM and never reach the fact-checker.
+# Kept low so borderline comments are still checked; set to 0 to fact-check everything.
+CLAIM_MIN_SCORE = float(os.getenv("CLAIM_MIN_SCORE", "0.75"))
+MIN_CLAIM_WORDS = 3            # shorter comments ("lol", "this", "source?") are never checkable
+
+NO_CLAIM = "No claim"
+
+# Words and numbers ("2020", "5%") both count towards MIN_CLAIM_WORDS; emoji and punctuation don't.
+_TOKEN = re.compile(r"[^\W_][\w'\-.,%]*")
+_NUMBER = re.compile(r"(?<![\w.])[$€£]?\d[\d,.]*\s*(%|percent|k|m|bn|million|billion|thousand)?", re.IGNORECASE)
+_YEAR = re.compile(r"\b(1[89]|20)\d{2}\b")
+_URL = re.compile(r"https?://|www\.|\b\w+\.(com|org|gov|edu|net)\b", re.IGNORECASE)
+_ACRONYM = re.compile(r"\b[A-Z]{2,6}\b")
+# Proper nouns: capitalised words that don't start a sentence.
+_PROPER_NOUN = re.compile(r"(?<![.!?]\s)(?<=\s)[A-Z][a-z]{2,}")
+# A capitalised word opening a sentence is usually the subject ("Vaccines cause ..."), unless
+# it's a common sentence starter.
+_INITIAL_WORD = re.compile(r"(?:^|(?<=[.!?])\s+)\W*([A-Z][a-z]{2,})(?=\s+\w)")
+_STARTERS = frozenset(
+    "the this that these those there their they then than and but also just well yes yeah nope "
+    "what why how when where who which its it's you your we our she her his him not maybe "
+    "honestly literally imagine please wow okay same agreed".split()
+)
+# Subjects that make "X is Y" a reaction rather than a claim ("this is the way", "you are the best").
+_PRONOUNS = _STARTERS | frozenset(
+    "i i'm i've me my he she we us they them it everyone everybody everything nobody nothing "
+    "someone somebody something anyone anybody anything one".split()
+)
+_COPULA = re.compile(r"\b(is|are|was|were|has|had|will|won'?t|did|didn'?t|never|always)\b", re.IGNORECASE)
+_ASSERTIVE = re.compile(
+    r"\b(announced|confirmed|reported|according to|found|shows?|showed|proves?|proved|caused|"
+    r"increased|decreased|rose|fell|killed|banned|passed|signed|voted|released|leaked|admitted|"
+    r"claims?|study|studies|data|statistics|research|evidence|officially|law|bill|"
+    r"causes?|caused|causing|lies|lied|lying|faked?|won|lost|paid|stole|stolen|rigged|cures?|cured|"
+    r"kills?|invented|funded|owns?|owned|hid|hides|hiding|covered up|controls?|commits?|committed|"
+    r"fails?|failed|improves?|improved|prevents?|prevented|spreads?|spreading|happened|born|staged|"
+    r"doubled|tripled|halved|went (up|down)|dropped|stopped|(don'?t|doesn'?t|didn'?t|do not|does not) work)\b",
+    re.IGNORECASE,
+)
+# Verdict-style assertions and comparisons ("is not real", "more crimes than").
+_VERDICT_LIKE = re.compile(
+    r"\b(is|are|was|were|isn't|aren't|wasn't)\s+(not\s+)?(real|true|false|fake|a hoax|a lie|illegal|legal)\b"
+    r"|\b(higher|lower|more|less|fewer|bigger|larger|smaller)\s+(\w+\s+){0,3}?than\b",
+    re.IGNORECASE,
+)
+# "<subject> is/are <predicate>": a checkable statement about a noun ("the earth is flat"),
+# unless the predicate is a judgement ("Messi is the goat", "that movie was amazing").
+_SUBJECT_PREDICATE = re.compile(
+    r"([\w']+)\s+(?:is|are|was|were|isn'?t|aren'?t|wasn'?t|weren'?t|has|have|had)\s+"
+    r"(?:(?:not|never|just|only|so|very|really|pretty|too|always)\s+)*(?:(?:a|an|the)\s+)?([\w']+)",
+    re.IGNORECASE,
+)
+_EVALUATIVE = frozenset(
+    "good great bad best worst better worse goat amazing awesome awful terrible horrible funny hilarious "
+    "cool cute beautiful gorgeous nice lovely gold fire lit overrated underrated wholesome boring stupid "
+    "dumb smart brilliant perfect legend king way right wrong insane crazy wild weird sad".split()
+)
+# Hedges only count against a comment with no factual signal: "I think vaccines cause autism"
+# is still a claim. Reactions always count against it.
+_HEDGE = re.compile(
+    r"\b(i think|i feel|i believe|imo|imho|in my opinion|i guess|pretty sure|i'm sure)\b",
+    re.IGNORECASE,
+)
+_OPINION = re.compile(
+    r"\b(i hope|i wish|i love|i hate|lol|lmao|haha|omg|wtf|agreed?|so true|thanks?|thank you)\b",
+    re.IGNORECASE,
+)
+
+
+def claim_score(text):
+    """
+    Cheap checkability score: numbers, dates, links, named entities, assertive or
+    reporting verbs and "<noun> is <predicate>" statements add evidence; judgements,
+    opinion markers and questions subtract it.
+    """
+    text = text or ""
+    if len(_TOKEN.findall(text)) < MIN_CLAIM_WORDS:
+        return 0.0
+
+    score = 0.0
+    score += 1.5 * min(len(_NUMBER.findall(text)), 2)
+    score += 1.0 if _YEAR.search(text) else 0.0
+    score += 1.0 if _URL.search(text) else 0.0
+    initial = [w for w in _INITIAL_WORD.findall(text) if w.lower() not in _STARTERS]
+    score += 0.75 * min(len(_ACRONYM.findall(text)) + len(_PROPER_NOUN.findall(text)) + len(initial), 3)
+    score += 0.5 if _COPULA.search(text) else 0.0
+
+    factual = 1.0 * min(len(_ASSERTIVE.findall(text)), 2) + 1.5 * min(len(_VERDICT_LIKE.findall(text)), 2)
+    for subject, predicate in _SUBJECT_PREDICATE.findall(text):
+        if predicate.lower() in _EVALUATIVE:
+            score -= 1.0
+        elif subject.lower() not in _PRONOUNS:
+            factual += 1.0
+    score += factual
+
+    if _OPINION.search(text) or (_HEDGE.search(text) and factual <= 0):
+        score -= 1.5
+    if text.rstrip().endswith("?"):
+        score -= 1.0
+    return score
+
+
+def detect_claims(texts, min_score=None):
+    """One bool per text: True where the text makes a checkable factual claim."""
+    min_score = CLAIM_MIN_SCORE if min_score is None else min_score
+    if min_score <= 0:
+        return [True] * len(texts)
+    return [claim_score(text) >= min_score for text in texts]
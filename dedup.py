@@ -0,0 +1,115 @@
+import os
+import re
+import random
+import hashlib
+
+# ---------------- Near-duplicate settings ---------------- #
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") != "0"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))   # estimated Jaccard similarity to merge
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3               # words per shingle
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1234)     # fixed seed: signatures are stable across runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_QUOTE_LINE = re.compile(r"^\s*>.*$", re.MULTILINE)
+_URL = re.compile(r"https?://\S+")
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def normalize(text):
+    """Lower-case, drop quoted lines (> ...), URLs and punctuation, collapse whitespace."""
+    text = _QUOTE_LINE.sub(" ", text or "")
+    text = _URL.sub(" ", text.lower())
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def cluster_key(text):
+    """
+    Stable cluster ID for a cluster represented by `text`: a short hash of its normalized
+    form (raw text when that is empty). IDs from separate report runs only match when the
+    representatives do, so merged reports never link unrelated comments.
+    """
+    key = normalize(text) or "raw:" + (text or "").strip()
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _shingles(normalized):
+    words = normalized.split()
+    if len(words) < SHINGLE_SIZE:
+        return {normalized}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(normalized):
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+        for s in _shingles(normalized)
+    ]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def _band_rows(threshold):
+    """Rows per LSH band whose S-curve midpoint (1/b)^(1/r) is closest to the threshold."""
+    candidates = [r for r in range(1, NUM_PERMUTATIONS + 1) if NUM_PERMUTATIONS % r == 0]
+    return min(candidates, key=lambda r: abs((r / NUM_PERMUTATIONS) ** (1 / r) - threshold))
+
+
+def cluster_comments(texts, threshold=None):
+    """
+    Group exact and near-duplicate texts (MinHash + LSH banding, union-find).
+    Returns (labels, representatives): labels[i] is the cluster ID of texts[i] (0..k-1,
+    in order of first appearance) and representatives[c] is the index of the first
+    member of cluster c.
+    """
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    normalized = [normalize(t) for t in texts]
+
+    # Exact duplicates (after normalization) never need a signature comparison. Texts that
+    # normalize to nothing (URL-, emoji- or quote-only) only merge with identical raw text.
+    first_seen = {}
+    for i, text in enumerate(normalized):
+        union(i, first_seen.setdefault(text or ("raw", (texts[i] or "").strip()), i))
+
+    if threshold < 1.0:
+        unique = sorted(set(first_seen.values()))
+        signatures = {i: minhash(normalized[i]) for i in unique if normalized[i]}
+        rows = _band_rows(threshold)
+        buckets = {}
+        for i, signature in signatures.items():
+            for start in range(0, NUM_PERMUTATIONS, rows):
+                buckets.setdefault((start, signature[start:start + rows]), []).append(i)
+        for members in buckets.values():
+            for n, j in enumerate(members):
+                for i in members[:n]:
+                    if find(i) == find(j):
+                        continue
+                    agreement = sum(a == b for a, b in zip(signatures[i], signatures[j])) / NUM_PERMUTATIONS
+                    if agreement >= threshold:
+                        union(i, j)
+
+    labels, representatives, cluster_of_root = [], [], {}
+    for i in range(len(texts)):
+        root = find(i)
+        if root not in cluster_of_root:
+            cluster_of_root[root] = len(representatives)
+            representatives.append(root)
+        labels.append(cluster_of_root[root])
+    return labels, representatives
@@ -0,0 +1,178 @@
+import os
+import time
+import json
+import uuid
+import sqlite3
+import threading
+
+# ---------------- Queue settings ---------------- #
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.sqlite3")
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))   # seconds a claimed task stays hidden
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))                 # claims before a task is failed
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", str(24 * 3600)))            # seconds finished jobs are kept
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Durable SQLite work queue shared by the app and any number of worker processes.
+    A job is a list of tasks; workers claim one task at a time under a lease
+    (visibility timeout). A task whose lease runs out, e.g. because its worker
+    crashed, is handed to the next worker, up to `max_attempts` claims.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH, visibility_timeout=JOB_VISIBILITY_TIMEOUT,
+                 max_attempts=JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _db(self):
+        # SQLite connections must not cross fork(); reopen in child processes.
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, meta TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, seq INTEGER NOT NULL,"
+                " payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " worker TEXT, lease_expires REAL, result TEXT, error TEXT, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id, seq)")
+        return self._conn
+
+    # ---------------- Producer side ---------------- #
+    def enqueue(self, payloads, meta=None):
+        """Store one job with a task per payload; returns the job id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("INSERT INTO jobs (id, meta, created_at) VALUES (?, ?, ?)",
+                       (job_id, json.dumps(meta or {}), now))
+            db.executemany(
+                "INSERT INTO tasks (job_id, seq, payload, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, seq, json.dumps(payload, ensure_ascii=False), QUEUED, now)
+                 for seq, payload in enumerate(payloads)],
+            )
+            db.execute("COMMIT")
+        return job_id
+
+    def progress(self, job_id):
+        """Task counts per status plus `total`, e.g. {"queued": 3, "done": 5, "total": 8}."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        counts["total"] = sum(counts.values())
+        counts["finished"] = counts[DONE] + counts[FAILED] == counts["total"]
+        return counts
+
+    def results(self, job_id, after_seq=-1):
+        """(seq, result) for finished tasks with seq > after_seq, in seq order."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT seq, result FROM tasks WHERE job_id = ? AND status = ? AND seq > ? ORDER BY seq",
+                (job_id, DONE, after_seq),
+            ).fetchall()
+        return [(seq, json.loads(result)) for seq, result in rows]
+
+    def errors(self, job_id):
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT seq, error FROM tasks WHERE job_id = ? AND status = ? ORDER BY seq", (job_id, FAILED)
+            ).fetchall()
+        return rows
+
+    def purge(self, older_than=JOB_RETENTION):
+        """Delete jobs created more than `older_than` seconds ago."""
+        cutoff = time.time() - older_than
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM tasks WHERE job_id IN (SELECT id FROM jobs WHERE created_at < ?)", (cutoff,))
+            db.execute("DELETE FROM jobs WHERE created_at < ?", (cutoff,))
+            db.execute("COMMIT")
+
+    # ---------------- Worker side ---------------- #
+    def claim(self, worker):
+        """
+        Lease the oldest available task to `worker`. Returns a dict with id, job_id,
+        seq, payload and attempts, or None when nothing is available.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            # BEGIN IMMEDIATE takes the write lock, so two workers can't claim the same row.
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that already used up their attempts are failed, not retried.
+                db.execute(
+                    "UPDATE tasks SET status = ?, error = 'visibility timeout exceeded', updated_at = ?"
+                    " WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (FAILED, now, RUNNING, now, self.max_attempts),
+                )
+                row = db.execute(
+                    "SELECT id, job_id, seq, payload, attempts FROM tasks"
+                    " WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                    " ORDER BY id LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE tasks SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1,"
+                        " updated_at = ? WHERE id = ?",
+                        (RUNNING, worker, now + self.visibility_timeout, now, row[0]),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"id": row[0], "job_id": row[1], "seq": row[2], "payload": json.loads(row[3]),
+                "attempts": row[4] + 1}
+
+    def _update_owned(self, sql, params, task_id, worker):
+        # Only the current lease holder may touch a task; a worker whose lease expired
+        # and was re-claimed elsewhere gets False back.
+        with self._lock:
+            cursor = self._db().execute(
+                f"{sql} WHERE id = ? AND worker = ? AND status = ?", params + (task_id, worker, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, task_id, worker):
+        """Extend the lease of a task that is still being worked on."""
+        now = time.time()
+        return self._update_owned("UPDATE tasks SET lease_expires = ?, updated_at = ?",
+                                  (now + self.visibility_timeout, now), task_id, worker)
+
+    def complete(self, task_id, worker, result):
+        return self._update_owned("UPDATE tasks SET status = ?, result = ?, lease_expires = NULL, updated_at = ?",
+                                  (DONE, json.dumps(result, ensure_ascii=False), time.time()), task_id, worker)
+
+    def fail(self, task_id, worker, error, attempts):
+        """Requeue the task, or fail it for good once it has used `max_attempts` claims."""
+        status = FAILED if attempts >= self.max_attempts else QUEUED
+        return self._update_owned("UPDATE tasks SET status = ?, error = ?, lease_expires = NULL, updated_at = ?",
+                                  (status, str(error), time.time()), task_id, worker)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,137 @@
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+
+# ---------------- Cache settings ---------------- #
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))         # seconds; 0 = never expire
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))     # LRU bound
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "0") == "1"
+LLM_CACHE_EVICT_EVERY = 100    # puts between TTL/LRU sweeps; the bound may be overshot by this much
+
+
+class LLMCache:
+    """
+    On-disk, content-addressed cache for agent replies.
+    Entries are keyed by sha256(model, system prompt, input text), expire after `ttl`
+    seconds and are evicted least-recently-used once `max_entries` is exceeded.
+    The cache is best-effort: a locked or broken database is a miss on get and a no-op on
+    put (counted as llm_cache_errors), never a failed LLM call.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES,
+                 enabled=not LLM_CACHE_DISABLED):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._puts_since_evict = 0
+
+    @staticmethod
+    def make_key(model, system_prompt, text):
+        payload = json.dumps([str(model), system_prompt, text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _db(self):
+        # SQLite connections must not cross fork(); reopen in child processes.
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+        return self._conn
+
+    def _error(self, action, error):
+        from metrics import metrics
+
+        self.errors += 1
+        metrics.incr("llm_cache_errors")
+        print(f"LLM cache {action} failed:", error)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                row = db.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row and self.ttl and now - row[1] > self.ttl:
+                    db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    db.commit()
+                    row = None
+                if row is not None:
+                    db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+                    db.commit()
+            except sqlite3.Error as e:
+                self._error("read", e)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._puts_since_evict += 1
+                if self._puts_since_evict >= LLM_CACHE_EVICT_EVERY:
+                    self._evict(db, now)
+                db.commit()
+            except sqlite3.Error as e:
+                self._error("write", e)
+
+    def _evict(self, db, now):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        self._puts_since_evict = 0
+        if self.ttl:
+            db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        # OFFSET skips the max_entries most recently used rows; the rest is overflow.
+        db.execute(
+            "DELETE FROM llm_cache WHERE key IN "
+            "(SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._db().execute("DELETE FROM llm_cache")
+            self._db().commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+llm_cache = LLMCache()
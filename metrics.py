@@ -0,0 +1,206 @@
+import time
+import json
+import threading
+import contextvars
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_cache import llm_cache
+
+PROMETHEUS_PREFIX = "reddit_toolkit"
+
+# Run recorders open in the current context. Threads started for a run only record into it
+# when their work runs in a copy of the run's context (contextvars.copy_context().run).
+_active_runs = contextvars.ContextVar("metrics_active_runs", default=())
+
+
+class Metrics:
+    """
+    Process-wide counters for pipeline stages, Reddit requests, LLM calls/tokens and
+    error/retry events. `run()` opens a per-run recorder that sees the events recorded
+    from its own context only, so concurrent sessions don't land in each other's runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ended = False
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stages = {}
+            self.reddit = {"requests": 0, "seconds": 0.0, "max_seconds": 0.0}
+            self.llm = {}
+            self.events = {}
+            self.cache = {"hits": 0, "misses": 0}
+
+    def _targets(self):
+        return [self] + [run for run in _active_runs.get() if not run._ended]
+
+    # ---------------- Recording ---------------- #
+    def record_stage(self, name, seconds):
+        with self._lock:
+            for target in self._targets():
+                stage = target.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+                stage["calls"] += 1
+                stage["seconds"] += seconds
+                stage["max_seconds"] = max(stage["max_seconds"], seconds)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - started)
+
+    def record_reddit(self, seconds):
+        with self._lock:
+            for target in self._targets():
+                target.reddit["requests"] += 1
+                target.reddit["seconds"] += seconds
+                target.reddit["max_seconds"] = max(target.reddit["max_seconds"], seconds)
+
+    @contextmanager
+    def reddit_request(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_reddit(time.perf_counter() - started)
+
+    def record_llm(self, agent, seconds, prompt_tokens=0, completion_tokens=0, error=False):
+        with self._lock:
+            for target in self._targets():
+                stats = target.llm.setdefault(agent, {
+                    "calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+                    "prompt_tokens": 0, "completion_tokens": 0,
+                })
+                stats["calls"] += 1
+                stats["errors"] += int(error)
+                stats["seconds"] += seconds
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+                stats["prompt_tokens"] += prompt_tokens
+                stats["completion_tokens"] += completion_tokens
+
+    def record_cache(self, hit):
+        with self._lock:
+            for target in self._targets():
+                target.cache["hits" if hit else "misses"] += 1
+
+    def incr(self, event, n=1):
+        """Count an error/retry/other event, e.g. incr("analysis_batch_retries")."""
+        with self._lock:
+            for target in self._targets():
+                target.events[event] = target.events.get(event, 0) + n
+
+    def start_run(self):
+        """Open a recorder for the work done from the current context from now on."""
+        recorder = Metrics()
+        _active_runs.set(_active_runs.get() + (recorder,))
+        return recorder
+
+    def end_run(self, recorder):
+        # Contexts copied from this one (worker threads) may still hold it; mark it closed too.
+        recorder._ended = True
+        _active_runs.set(tuple(run for run in _active_runs.get() if run is not recorder))
+        return recorder
+
+    @contextmanager
+    def run(self):
+        recorder = self.start_run()
+        try:
+            yield recorder
+        finally:
+            self.end_run(recorder)
+
+    # ---------------- Export ---------------- #
+    def summary(self):
+        with self._lock:
+            lookups = self.cache["hits"] + self.cache["misses"]
+            return {
+                "started_at": self.started_at,
+                "wall_seconds": time.time() - self.started_at,
+                "stages": {k: dict(v) for k, v in self.stages.items()},
+                "reddit": dict(self.reddit),
+                "llm": {k: dict(v) for k, v in self.llm.items()},
+                "cache": dict(self.cache, hit_rate=self.cache["hits"] / lookups if lookups else 0.0,
+                              enabled=llm_cache.enabled),
+                "events": dict(self.events),
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.summary(), **kwargs)
+
+    def to_prometheus(self):
+        data = self.summary()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            full = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{full}{{{label_text}}} {value}" if label_text else f"{full} {value}")
+
+        stages = data["stages"]
+        metric("stage_calls_total", "counter", "Pipeline stage invocations.",
+               [({"stage": k}, v["calls"]) for k, v in stages.items()])
+        metric("stage_seconds_total", "counter", "Wall time spent per pipeline stage.",
+               [({"stage": k}, v["seconds"]) for k, v in stages.items()])
+        metric("reddit_requests_total", "counter", "Reddit API requests.", [({}, data["reddit"]["requests"])])
+        metric("reddit_request_seconds_total", "counter", "Time spent in Reddit API requests.",
+               [({}, data["reddit"]["seconds"])])
+        llm = data["llm"]
+        metric("llm_calls_total", "counter", "LLM calls per agent.", [({"agent": k}, v["calls"]) for k, v in llm.items()])
+        metric("llm_errors_total", "counter", "Failed LLM calls per agent.", [({"agent": k}, v["errors"]) for k, v in llm.items()])
+        metric("llm_seconds_total", "counter", "LLM call latency per agent.", [({"agent": k}, v["seconds"]) for k, v in llm.items()])
+        metric("llm_tokens_total", "counter", "LLM tokens per agent.",
+               [({"agent": k, "kind": kind}, v[f"{kind}_tokens"]) for k, v in llm.items() for kind in ("prompt", "completion")])
+        metric("cache_lookups_total", "counter", "LLM cache lookups.",
+               [({"result": "hit"}, data["cache"]["hits"]), ({"result": "miss"}, data["cache"]["misses"])])
+        metric("events_total", "counter", "Errors, retries and other pipeline events.",
+               [({"event": k}, v) for k, v in data["events"].items()])
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def timed(stage_name):
+    """Decorator recording each call's wall time under `stage_name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with metrics.stage(stage_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _PrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port):
+    """Serve Prometheus text on http://0.0.0.0:<port>/ from a daemon thread (once per process)."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), _PrometheusHandler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
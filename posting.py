@@ -0,0 +1,91 @@
+import os
+import re
+import time
+import threading
+
+# ---------------- Posting settings ---------------- #
+FLAIR_CACHE_TTL = int(os.getenv("FLAIR_CACHE_TTL", "3600"))       # seconds a subreddit's templates stay cached
+FLAIR_MISS_REFRESH = 60        # an unknown flair refetches templates at most this often (seconds)
+POST_MAX_RETRIES = int(os.getenv("POST_MAX_RETRIES", "3"))
+POST_RETRY_DELAY = 60.0        # seconds to wait when Reddit rate-limits a submit without saying how long
+
+_WAIT = re.compile(r"(\d+)\s*(millisecond|second|minute|hour)", re.IGNORECASE)
+_UNIT_SECONDS = {"millisecond": 0.001, "second": 1, "minute": 60, "hour": 3600}
+
+
+class FlairCache:
+    """
+    Link-flair templates per subreddit as a {lower-cased text: template id} index, so
+    lookups are O(1) and case-insensitive. Entries expire after `ttl` seconds; a
+    flair that isn't in the index triggers one early refresh (at most every
+    FLAIR_MISS_REFRESH seconds) in case the moderators just added it.
+    """
+
+    def __init__(self, ttl=FLAIR_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _load(self, subreddit, fetch):
+        index = {}
+        for template in fetch():
+            text = (template.get("text") or "").strip().lower()
+            if text and text not in index:
+                index[text] = template["id"]
+        entry = (time.time(), index)
+        with self._lock:
+            self._entries[subreddit.lower()] = entry
+        return entry
+
+    def index(self, subreddit, fetch):
+        """The flair index for `subreddit`; fetch() returns its templates when not cached."""
+        return self._entry(subreddit, fetch)[1]
+
+    def _entry(self, subreddit, fetch):
+        with self._lock:
+            entry = self._entries.get(subreddit.lower())
+        if entry is None or time.time() - entry[0] > self.ttl:
+            entry = self._load(subreddit, fetch)
+        return entry
+
+    def lookup(self, subreddit, flair_text, fetch):
+        """Template id for flair_text (case-insensitive), or None if the subreddit has none."""
+        key = (flair_text or "").strip().lower()
+        if not key:
+            return None
+        loaded_at, index = self._entry(subreddit, fetch)
+        if key not in index and time.time() - loaded_at > FLAIR_MISS_REFRESH:
+            loaded_at, index = self._load(subreddit, fetch)
+        return index.get(key)
+
+    def invalidate(self, subreddit=None):
+        with self._lock:
+            if subreddit is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(subreddit.lower(), None)
+
+
+flair_cache = FlairCache()
+
+
+def submit_retry_delay(exc):
+    """
+    Seconds to wait before resubmitting, or None if the error is not retryable.
+    Only errors where Reddit rejected the submit outright (RATELIMIT, HTTP 429) are
+    retryable; anything else may have created the post already.
+    """
+    for item in getattr(exc, "items", None) or ():
+        if getattr(item, "error_type", None) == "RATELIMIT":
+            match = _WAIT.search(getattr(item, "message", "") or "")
+            if match:
+                return int(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()]
+            return POST_RETRY_DELAY
+    response = getattr(exc, "response", None)
+    if (getattr(exc, "status_code", None) or getattr(response, "status_code", None)) == 429:
+        retry_after = (getattr(response, "headers", None) or {}).get("retry-after")
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return POST_RETRY_DELAY
+    return None
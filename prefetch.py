@@ -0,0 +1,121 @@
+import os
+import time
+import threading
+import traceback
+
+from metrics import metrics
+from snapshots import snapshot_store
+
+# ---------------- Prefetch settings ---------------- #
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") != "0"
+PREFETCH_INTERVAL = int(os.getenv("PREFETCH_INTERVAL", "600"))        # seconds between refresh cycles
+PREFETCH_MAX_QUERIES = int(os.getenv("PREFETCH_MAX_QUERIES", "5"))    # refreshes per cycle
+PREFETCH_MAX_SECONDS = int(os.getenv("PREFETCH_MAX_SECONDS", "300"))  # no new refresh starts after this
+PREFETCH_MIN_SCORE = float(os.getenv("PREFETCH_MIN_SCORE", "1.5"))    # decayed query count; 1.5 = asked twice within a half-life
+PREFETCH_HALF_LIFE = 3600      # seconds for a query's popularity to halve
+PREFETCH_MAX_TRACKED = 500     # least popular queries are forgotten beyond this
+
+
+class QueryPopularity:
+    """Exponentially decayed query counts per snapshot key, safe across sessions."""
+
+    def __init__(self, half_life=PREFETCH_HALF_LIFE, max_tracked=PREFETCH_MAX_TRACKED):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self._scores = {}
+
+    def _decayed(self, score, updated_at, now):
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+
+    def record(self, key):
+        now = time.time()
+        with self._lock:
+            score, updated_at = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decayed(score, updated_at, now) + 1, now)
+            if len(self._scores) > self.max_tracked:
+                coldest = min(self._scores, key=lambda k: self._decayed(*self._scores[k], now))
+                del self._scores[coldest]
+
+    def top(self, n, min_score=0.0):
+        """The n most popular keys with score >= min_score, most popular first."""
+        now = time.time()
+        with self._lock:
+            scored = [(self._decayed(score, updated_at, now), key) for key, (score, updated_at) in self._scores.items()]
+        scored = [(score, key) for score, key in scored if score >= min_score]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [(key, score) for score, key in scored[:n]]
+
+
+class PrefetchScheduler:
+    """
+    Background thread that keeps the snapshots of popular queries warm: every
+    `interval` seconds it re-runs fetch_posts + generate_report for the most popular
+    keys whose snapshot is missing or older than `interval`, within the per-cycle
+    budget (max_queries refreshes, max_seconds of work).
+    """
+
+    def __init__(self, popularity, interval=PREFETCH_INTERVAL, max_queries=PREFETCH_MAX_QUERIES,
+                 max_seconds=PREFETCH_MAX_SECONDS, min_score=PREFETCH_MIN_SCORE, store=snapshot_store):
+        self.popularity = popularity
+        self.interval = interval
+        self.max_queries = max_queries
+        self.max_seconds = max_seconds
+        self.min_score = min_score
+        self.store = store
+        self.last_cycle = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self, key):
+        import agents
+        from report_store import ReportStore
+
+        subreddits, keywords, post_limit, comment_limit = key
+        with metrics.stage("prefetch_refresh"):
+            posts = agents.fetch_posts(list(subreddits), list(keywords), post_limit, comment_limit)
+            if not posts:
+                return None
+            report = ReportStore(agents.generate_report(posts))
+        return self.store.put(key, posts, report, source="prefetch")
+
+    def run_once(self):
+        """One refresh cycle; returns the keys that were refreshed."""
+        started = time.monotonic()
+        refreshed = []
+        for key, _ in self.popularity.top(self.max_queries, self.min_score):
+            snapshot = self.store.get(key)
+            if snapshot is not None and snapshot.report is not None and snapshot.age < self.interval:
+                continue
+            if time.monotonic() - started > self.max_seconds:
+                metrics.incr("prefetch_budget_exhausted")
+                break
+            try:
+                if self.refresh(key) is not None:
+                    refreshed.append(key)
+                    metrics.incr("prefetch_refreshes")
+            except Exception as e:
+                metrics.incr("prefetch_errors")
+                print(f"Prefetch of {key} failed:", e)
+                traceback.print_exc()
+        self.last_cycle = time.time()
+        return refreshed
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+query_popularity = QueryPopularity()
+prefetcher = PrefetchScheduler(query_popularity)
@@ -0,0 +1,150 @@
+import os
+import re
+import threading
+
+from metrics import metrics
+
+# ---------------- Token budgets ---------------- #
+# Budget per call for everything we send (system prompt + user prompt), in tokens.
+PROMPT_BUDGETS = {
+    "collector": int(os.getenv("COLLECTOR_PROMPT_BUDGET", "2500")),
+    "analysis": int(os.getenv("ANALYSIS_PROMPT_BUDGET", "4000")),
+    "sentiment": int(os.getenv("SENTIMENT_PROMPT_BUDGET", "800")),
+    "factchecker": int(os.getenv("FACTCHECKER_PROMPT_BUDGET", "800")),
+    "comment": int(os.getenv("COMMENT_PROMPT_BUDGET", "800")),
+}
+ITEM_TOKEN_CAP = int(os.getenv("PROMPT_ITEM_TOKEN_CAP", "400"))   # no single comment/title gets more
+ITEM_OVERHEAD_TOKENS = 8       # numbering / JSON keys and quoting around each item
+CHARS_PER_TOKEN = 4            # fallback estimate when tiktoken is not installed
+TOKENIZER_MODEL = "gpt-4o"
+HEAD_SHARE = 0.4               # of an item's budget kept from the start
+TAIL_SHARE = 0.2               # ... and from the end; the rest goes to keyword sentences
+ELLIPSIS = " … "
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """tiktoken encoding for TOKENIZER_MODEL, or False when tiktoken is unavailable."""
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                try:
+                    _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # Not installed, or no cached BPE file and no network: use the estimate.
+                _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    text = text or ""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def clip(text, budget, from_end=False):
+    """Cut text to at most `budget` tokens, from the start (or from the end)."""
+    if budget <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= budget:
+            return text
+        return encoding.decode(tokens[-budget:] if from_end else tokens[:budget])
+    chars = budget * CHARS_PER_TOKEN
+    return text[-chars:] if from_end else text[:chars]
+
+
+def compress(text, budget, keywords=()):
+    """
+    Fit text into `budget` tokens: keep the opening and closing sentences plus, from the
+    middle, sentences mentioning any keyword. Returns (text, truncated).
+    """
+    text = text or ""
+    if count_tokens(text) <= budget:
+        return text, False
+    sentences = [s for s in _SENTENCE.split(text) if s.strip()]
+    if len(sentences) < 3:
+        head = clip(text, int(budget * (HEAD_SHARE + TAIL_SHARE * 2)))
+        tail = clip(text, budget - count_tokens(head) - 1, from_end=True)
+        return head + ELLIPSIS + tail if tail else head, True
+
+    costs = [count_tokens(s) + 1 for s in sentences]
+    keep = set()
+
+    def take(indices, allowance):
+        used = 0
+        for i in indices:
+            if i not in keep and used + costs[i] <= allowance:
+                keep.add(i)
+                used += costs[i]
+            elif i not in keep:
+                break
+        return used
+
+    used = take(range(len(sentences)), int(budget * HEAD_SHARE))
+    used += take(range(len(sentences) - 1, -1, -1), int(budget * TAIL_SHARE))
+    needles = [k.lower() for k in keywords or () if k]
+    if needles:
+        for i, sentence in enumerate(sentences):
+            lowered = sentence.lower()
+            if i not in keep and used + costs[i] <= budget and any(k in lowered for k in needles):
+                keep.add(i)
+                used += costs[i]
+    # Whatever budget is left continues the opening.
+    take(range(len(sentences)), budget - used)
+    if not keep:
+        return clip(text, budget), True
+
+    parts, previous = [], None
+    for i in sorted(keep):
+        if previous is not None and i != previous + 1:
+            parts.append(ELLIPSIS.strip())
+        parts.append(sentences[i])
+        previous = i
+    return " ".join(parts), True
+
+
+def fit_items(agent, system_prompt, fixed_text, items, keywords=(), max_tokens=None):
+    """
+    Compress `items` (comment bodies, titles, ...) so system prompt + fixed text + items
+    stay within PROMPT_BUDGETS[agent], or max_tokens (the model context cap) if smaller.
+    Short items keep their full text and leave the unused share to longer ones.
+    Truncations are counted in metrics.
+    """
+    budget = PROMPT_BUDGETS.get(agent, 0)
+    if max_tokens:
+        budget = min(budget, max_tokens) if budget else max_tokens
+    if not budget or not items:
+        return list(items)
+    remaining = budget - count_tokens(system_prompt) - count_tokens(fixed_text) - ITEM_OVERHEAD_TOKENS * len(items)
+    costs = [count_tokens(item) for item in items]
+
+    # Water-filling: items under the equal share keep everything, the rest split what's left.
+    shares = [0] * len(items)
+    order = sorted(range(len(items)), key=costs.__getitem__)
+    left = max(remaining, 0)
+    for position, i in enumerate(order):
+        share = min(left // (len(items) - position), ITEM_TOKEN_CAP)
+        shares[i] = min(costs[i], share)
+        left -= shares[i]
+
+    fitted, truncated = [], 0
+    for item, share in zip(items, shares):
+        text, was_truncated = compress(item, share, keywords)
+        fitted.append(text)
+        truncated += was_truncated
+    if truncated:
+        metrics.incr("prompt_items_truncated", truncated)
+        metrics.incr(f"{agent}_prompts_truncated")
+    return fitted
@@ -0,0 +1,153 @@
+import os
+import time
+import random
+import threading
+
+from metrics import metrics
+
+# ---------------- Governor settings ---------------- #
+REDDIT_MAX_RPS = float(os.getenv("REDDIT_MAX_RPS", "1.6"))    # ~100 req/min, Reddit's OAuth allowance
+REDDIT_BURST = int(os.getenv("REDDIT_BURST", "5"))
+LLM_MAX_RPS = float(os.getenv("LLM_MAX_RPS", "8"))            # starting/maximum model requests per second
+LLM_BURST = int(os.getenv("LLM_BURST", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))      # retries after a 429/5xx before giving up
+BACKOFF_BASE = 1.0             # seconds; doubled per attempt, full jitter
+BACKOFF_MAX = 60.0
+MIN_RATE_FRACTION = 0.05       # never slow below 5% of the configured rate
+RECOVERY_FRACTION = 0.05       # rate regained per success, as a share of the max rate
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _status_and_retry_after(exc):
+    """HTTP status and Retry-After seconds from openai/prawcore/requests-style errors."""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = getattr(exc, "retry_after", None) or headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        retry_after = float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        retry_after = None
+    return status, retry_after
+
+
+class RateGovernor:
+    """
+    Token bucket shared by every thread (and Streamlit session) of the process.
+    `rate` adapts: a rate-limited response halves it and pauses everyone for the
+    Retry-After/backoff delay; each success recovers a little, up to `max_rate`.
+    Reddit's own remaining/reset counters, when available, cap the rate directly.
+    max_rate=None disables throttling (offline benchmarks).
+    """
+
+    def __init__(self, name, max_rate, burst=1, max_retries=0, limits_source=None):
+        self.name = name
+        self.max_retries = max_retries
+        self.limits_source = limits_source
+        self._lock = threading.Lock()
+        self.configure(max_rate, burst)
+
+    def configure(self, max_rate, burst=None):
+        with self._lock:
+            self.max_rate = max_rate
+            self.rate = max_rate
+            self.burst = burst if burst is not None else getattr(self, "burst", 1)
+            self._tokens = float(self.burst)
+            self._updated = time.monotonic()
+            self._paused_until = 0.0
+            self.waited = 0.0
+            self.throttled = 0
+
+    # ---------------- Tokens ---------------- #
+    def acquire(self):
+        """Block until a request may start."""
+        if not self.max_rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                self.waited += delay
+            time.sleep(delay)
+
+    # ---------------- Feedback ---------------- #
+    def on_success(self, limits_source=None):
+        """limits_source: returns the limits of the client that made the request (default self.limits_source)."""
+        if not self.max_rate:
+            return
+        source = limits_source or self.limits_source
+        limits = None
+        if source:
+            try:
+                limits = source()
+            except Exception as e:
+                # Limits only tune the pace; the request itself already succeeded.
+                metrics.incr(f"{self.name}_limits_errors")
+                print(f"{self.name}: could not read rate limits:", e)
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_FRACTION)
+            if limits:
+                self._apply_limits(limits)
+
+    def _apply_limits(self, limits):
+        # praw: reddit.auth.limits = {"remaining": float, "reset_timestamp": epoch, "used": int}
+        remaining, reset_at = limits.get("remaining"), limits.get("reset_timestamp")
+        if remaining is None or reset_at is None:
+            return
+        window = max(reset_at - time.time(), 0.0)
+        if remaining < 1:
+            self._paused_until = max(self._paused_until, time.monotonic() + window)
+        elif window > 0:
+            self.rate = max(self.max_rate * MIN_RATE_FRACTION, min(self.rate, remaining / window))
+
+    def on_rate_limited(self, attempt, retry_after=None):
+        """Slow down and pause all callers; returns the pause in seconds."""
+        delay = retry_after if retry_after is not None else random.uniform(
+            0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        )
+        with self._lock:
+            self.throttled += 1
+            if self.max_rate:
+                self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    # ---------------- Calls ---------------- #
+    def call(self, fn, *args, limits_source=None, **kwargs):
+        """
+        Run fn under the governor, retrying rate-limit/5xx errors up to max_retries.
+        limits_source: see on_success().
+        """
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                status, retry_after = _status_and_retry_after(e)
+                if status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise
+                delay = self.on_rate_limited(attempt, retry_after)
+                metrics.incr(f"{self.name}_rate_limited")
+                print(f"{self.name}: HTTP {status}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                if not self.max_rate:
+                    time.sleep(delay)
+                attempt += 1
+                continue
+            self.on_success(limits_source)
+            return result
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "max_rate": self.max_rate, "waited_seconds": self.waited,
+                    "throttled": self.throttled}
+
+
+reddit_governor = RateGovernor("reddit", REDDIT_MAX_RPS, REDDIT_BURST, max_retries=3)
+model_governor = RateGovernor("model", LLM_MAX_RPS, LLM_BURST, max_retries=LLM_MAX_RETRIES)
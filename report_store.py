@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from claims import NO_CLAIM
+
+# ---------------- Report schema ---------------- #
+# Post-level fields are stored once per post; comment rows reference them by post_id.
+POST_FIELDS = ("Subreddit", "Post Title", "Post Link", "Post Upvotes", "Collector Summary")
+COMMENT_FIELDS = ("Comment", "Comment Upvotes", "Sentiment", "Sentiment Tier", "Fact Verdict", "Cluster ID")
+REPORT_COLUMNS = POST_FIELDS + COMMENT_FIELDS       # generate_report row order
+VERDICT_CATEGORIES = ("True", "False", "Unverified", NO_CLAIM)
+
+
+class ReportStore:
+    """
+    Columnar report: report rows go in one at a time (append/extend) and are kept as
+    column lists, with post fields deduplicated by Post Link. The DataFrames and
+    per-subreddit / per-post aggregates are built on first use and cached until the
+    next append.
+    """
+
+    def __init__(self, rows=()):
+        self._post_ids = {}
+        self._posts = {field: [] for field in POST_FIELDS}
+        self._comments = {field: [] for field in COMMENT_FIELDS}
+        self._comments["post_id"] = []
+        self._cache = {}
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self._comments["post_id"])
+
+    def append(self, row):
+        link = row.get("Post Link")
+        post_id = self._post_ids.get(link)
+        if post_id is None:
+            post_id = self._post_ids[link] = len(self._post_ids)
+            for field in POST_FIELDS:
+                self._posts[field].append(row.get(field))
+        self._comments["post_id"].append(post_id)
+        for field in COMMENT_FIELDS:
+            self._comments[field].append(row.get(field))
+        self._cache.clear()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def _cached(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    # ---------------- Frames ---------------- #
+    @property
+    def posts(self):
+        def build():
+            frame = pd.DataFrame(self._posts, columns=list(POST_FIELDS))
+            frame["Subreddit"] = frame["Subreddit"].astype("category")
+            frame.index.name = "post_id"
+            return frame
+        return self._cached("posts", build)
+
+    @property
+    def comments(self):
+        def build():
+            frame = pd.DataFrame(self._comments, columns=list(COMMENT_FIELDS) + ["post_id"])
+            frame["Sentiment"] = pd.to_numeric(frame["Sentiment"], errors="coerce").astype("float32")
+            frame["Comment Upvotes"] = pd.to_numeric(frame["Comment Upvotes"], errors="coerce").fillna(0).astype("int64")
+            frame["Fact Verdict"] = pd.Categorical(frame["Fact Verdict"], categories=VERDICT_CATEGORIES)
+            frame["Sentiment Tier"] = frame["Sentiment Tier"].astype("category")
+            frame["post_id"] = frame["post_id"].astype("int32")
+            # Weight = upvotes floored at 0, plus 1 so unvoted comments still count.
+            weight = frame["Comment Upvotes"].clip(lower=0) + 1
+            frame["_weight"] = weight
+            frame["_weighted_sentiment"] = frame["Sentiment"] * weight
+            return frame
+        return self._cached("comments", build)
+
+    def to_frame(self):
+        """Flat report (one row per comment, generate_report's columns) for display/export."""
+        def build():
+            comments = self.comments
+            posts = self.posts.take(comments["post_id"].to_numpy())
+            frame = pd.concat(
+                [posts.reset_index(drop=True), comments[list(COMMENT_FIELDS)].reset_index(drop=True)], axis=1
+            )
+            return frame[list(REPORT_COLUMNS)]
+        return self._cached("frame", build)
+
+    # ---------------- Aggregates ---------------- #
+    @staticmethod
+    def _summarize(comments, key):
+        grouped = comments.groupby(key, observed=True)
+        summary = pd.DataFrame({
+            "Comments": grouped.size(),
+            "Mean Sentiment": grouped["Sentiment"].mean(),
+            "Weighted Sentiment": grouped["_weighted_sentiment"].sum() / grouped["_weight"].sum(),
+            "Comment Upvotes": grouped["Comment Upvotes"].sum(),
+        })
+        verdicts = pd.crosstab(comments[key], comments["Fact Verdict"], dropna=False)
+        verdicts = verdicts.reindex(columns=list(VERDICT_CATEGORIES), fill_value=0)
+        verdicts.columns = list(VERDICT_CATEGORIES)
+        return summary.join(verdicts)
+
+    def subreddit_summary(self):
+        """Per subreddit: posts, comments, mean and upvote-weighted sentiment, verdict counts."""
+        def build():
+            comments = self.comments.assign(
+                Subreddit=self.posts["Subreddit"].take(self.comments["post_id"].to_numpy()).to_numpy()
+            )
+            posts = self.posts.groupby("Subreddit", observed=True).size().rename("Posts")
+            return posts.to_frame().join(self._summarize(comments, "Subreddit"), how="inner")
+        return self._cached("subreddit_summary", build)
+
+    def post_summary(self):
+        """Per post (indexed by post_id): post fields plus the same aggregates."""
+        def build():
+            summary = self._summarize(self.comments, "post_id")
+            return self.posts[["Subreddit", "Post Title", "Post Link", "Post Upvotes"]].join(summary, how="inner")
+        return self._cached("post_summary", build)
+
+    def verdict_counts(self):
+        return self._cached(
+            "verdict_counts",
+            lambda: self.comments["Fact Verdict"].value_counts(sort=False).reindex(list(VERDICT_CATEGORIES), fill_value=0),
+        )
+
+    def sentiment_histogram(self):
+        """Comment counts per 0.2-wide sentiment bin, labelled by bin centre."""
+        def build():
+            counts, _ = np.histogram(self.comments["Sentiment"].dropna(), bins=np.linspace(-1.0, 1.0, 11))
+            centres = np.round(np.linspace(-0.9, 0.9, 10), 1)
+            return pd.Series(counts, index=centres, name="Comments")
+        return self._cached("sentiment_histogram", build)
+
+    def checked_share(self):
+        """Share of comments with a fact-check verdict (a known verdict other than NO_CLAIM)."""
+        if not len(self):
+            return 0.0
+        verdicts = self.comments["Fact Verdict"]
+        return float((verdicts.notna() & (verdicts != NO_CLAIM)).mean())
@@ -0,0 +1,73 @@
+import re
+import heapq
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Matches any of several keywords against a comment body, lower-casing the body once.
+    Default mode mirrors the old `kw.lower() in body.lower()` check (case-insensitive
+    substring). word_boundary=True only matches whole words via one combined regex,
+    case_sensitive=True keeps case. An empty keyword list matches everything.
+    """
+
+    def __init__(self, keywords=None, word_boundary=False, case_sensitive=False):
+        self.case_sensitive = case_sensitive
+        needles = {k if case_sensitive else k.lower() for k in (keywords or []) if k}
+        # Longest first so overlapping keywords prefer the most specific alternative.
+        self.keywords = tuple(sorted(needles, key=len, reverse=True))
+        # Identifies the matching behaviour, e.g. for coalescing identical fetches.
+        self.key = (self.keywords, word_boundary, case_sensitive)
+        self._regex = None
+        if self.keywords and word_boundary:
+            pattern = "|".join(re.escape(k) for k in self.keywords)
+            self._regex = re.compile(rf"(?<!\w)(?:{pattern})(?!\w)")
+
+    def matches(self, text):
+        if not self.keywords:
+            return True
+        text = text or ""
+        if not self.case_sensitive:
+            text = text.lower()
+        # Plain substring scans (C speed) reject most non-matching comments before the regex runs;
+        # a combined alternation regex is markedly slower than `in` when nothing matches.
+        if not any(k in text for k in self.keywords):
+            return False
+        return self._regex is None or self._regex.search(text) is not None
+
+
+def walk_comments(forest, max_depth=None, max_comments=None):
+    """
+    Breadth-first walk over a PRAW comment forest (same order as CommentForest.list()).
+    max_depth: deepest reply level to visit (0 = top-level comments only)
+    max_comments: stop after visiting this many comments
+    """
+    queue = deque((comment, 0) for comment in forest)
+    visited = 0
+    while queue:
+        comment, depth = queue.popleft()
+        if not hasattr(comment, "body"):  # MoreComments placeholders
+            continue
+        yield comment
+        visited += 1
+        if max_comments is not None and visited >= max_comments:
+            return
+        if max_depth is None or depth < max_depth:
+            queue.extend((reply, depth + 1) for reply in getattr(comment, "replies", []))
+
+
+def select_top_comments(forest, matcher, k, max_depth=None, max_comments=None):
+    """
+    Top-k keyword-matching comments by score, as report dicts.
+    Uses a heap (O(n log k)) instead of sorting every match; ties keep walk order.
+    """
+    matched = (
+        comment
+        for comment in walk_comments(forest, max_depth, max_comments)
+        if matcher.matches(comment.body)
+    )
+    top = heapq.nlargest(k, matched, key=lambda c: getattr(c, "score", 0))
+    return [
+        {"Comment Body": c.body, "Upvotes": getattr(c, "score", 0), "Comment ID": getattr(c, "id", None)}
+        for c in top
+    ]
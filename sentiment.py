@@ -0,0 +1,48 @@
+import os
+import re
+
+# ---------------- Local sentiment tier ---------------- #
+# Comments whose local confidence reaches this threshold keep the TextBlob score;
+# the rest are escalated to sentiment_agent. Set above 1.0 to always use the LLM.
+SENTIMENT_CONFIDENCE_THRESHOLD = float(os.getenv("SENTIMENT_CONFIDENCE_THRESHOLD", "0.35"))
+LONG_COMMENT_WORDS = 60        # lexicon averages get unreliable past this length
+
+TIER_LOCAL = "local"
+TIER_LLM = "llm"
+
+# Contrast, sarcasm and hedging make a lexicon score untrustworthy.
+_AMBIGUOUS = re.compile(
+    r"\b(but|however|although|though|except|yeah right|as if|not sure)\b|/s\b|\?\s*$",
+    re.IGNORECASE,
+)
+
+
+def local_sentiment(texts):
+    """
+    Score texts with TextBlob in one pass.
+    Returns a list of (score, confidence) pairs, score in [-1, 1] and confidence in [0, 1].
+    """
+    from textblob import TextBlob  # imported on first use; it pulls in nltk
+
+    results = []
+    for text in texts:
+        text = text or ""
+        polarity = TextBlob(text).sentiment.polarity
+        confidence = abs(polarity)
+        if _AMBIGUOUS.search(text):
+            confidence *= 0.5
+        if len(text.split()) > LONG_COMMENT_WORDS:
+            confidence *= 0.75
+        results.append((round(polarity, 3), confidence))
+    return results
+
+
+def triage_sentiment(texts, threshold=None):
+    """
+    Returns one local score per text, or None where the text should go to the LLM tier.
+    """
+    threshold = SENTIMENT_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    return [
+        score if confidence >= threshold else None
+        for score, confidence in local_sentiment(texts)
+    ]
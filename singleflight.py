@@ -0,0 +1,98 @@
+import threading
+
+from metrics import metrics
+
+
+class FrozenDict(dict):
+    """dict that refuses mutation; still a dict for json, pandas and Streamlit."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared result is read-only; copy it (dict(obj)) before changing it")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        # copy/deepcopy/pickle produce a plain, writable dict.
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """list that refuses mutation; still a list for json, pandas and Streamlit."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared result is read-only; copy it (list(obj)) before changing it")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(value):
+    """Recursively wrap dicts/lists so one result can be handed to many callers safely."""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls across threads (and so across Streamlit
+    sessions): the first caller for a key runs fn, concurrent callers with the same
+    key wait and receive the same frozen result (or the same exception). Nothing is
+    cached once the call finishes; that is the job of llm_cache and snapshots.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            metrics.incr(f"{self.name}_coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = freeze(fn(*args, **kwargs))
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+fetch_flight = SingleFlight("fetch")
+agent_flight = SingleFlight("llm")
@@ -0,0 +1,77 @@
+import os
+import time
+import threading
+
+# ---------------- Snapshot settings ---------------- #
+SNAPSHOT_TTL = int(os.getenv("SNAPSHOT_TTL", "900"))              # seconds a fetch stays reusable
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SNAPSHOT_MAX_ENTRIES", "64"))
+
+
+def snapshot_key(subreddits, keywords, post_limit, comment_limit):
+    """Normalized key for one fetch: subreddit order is kept (it drives output order)."""
+    return (
+        tuple(s.strip().lower() for s in subreddits if s.strip()),
+        tuple(sorted({k.strip().lower() for k in (keywords or []) if k.strip()})),
+        int(post_limit),
+        int(comment_limit),
+    )
+
+
+class Snapshot:
+    """
+    Fetched posts (and the report built from them, once analyzed) for one key.
+    `source` is "interactive", or "prefetch" when the background scheduler built it.
+    """
+
+    def __init__(self, key, posts, report=None, created_at=None, source="interactive"):
+        self.key = key
+        self.posts = posts
+        self.report = report
+        self.created_at = created_at or time.time()
+        self.source = source
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+
+class SnapshotStore:
+    """
+    Process-wide, thread-safe store of fetch snapshots with TTL expiry.
+    Shared by every Streamlit session in the process; sessions also keep their own
+    last snapshot in st.session_state.
+    """
+
+    def __init__(self, ttl=SNAPSHOT_TTL, max_entries=SNAPSHOT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._snapshots = {}
+
+    def get(self, key):
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot and snapshot.age > self.ttl:
+                del self._snapshots[key]
+                snapshot = None
+            return snapshot
+
+    def put(self, key, posts, report=None, source="interactive"):
+        snapshot = Snapshot(key, posts, report, source=source)
+        with self._lock:
+            self._snapshots[key] = snapshot
+            while len(self._snapshots) > self.max_entries:
+                oldest = min(self._snapshots.values(), key=lambda s: s.created_at)
+                del self._snapshots[oldest.key]
+        return snapshot
+
+    def invalidate(self, key=None):
+        """Drop one snapshot, or all of them when key is None."""
+        with self._lock:
+            if key is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(key, None)
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,87 @@
+"""
+Claim filter regression set, held out from benchmarks/bench_claims.py: lowercase, hedged
+and apostrophe-less misinformation must still reach the fact-checker.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from claims import CLAIM_MIN_SCORE, claim_score, detect_claims  # noqa: E402
+
+CLAIMS = [
+    "the earth is flat",
+    "masks dont work at all",
+    "5g spreads covid",
+    "I think vaccines cause autism",
+    "i believe the vaccine has a microchip in it",
+    "pretty sure the moon landing was staged",
+    "smoking doesnt cause cancer",
+    "the holocaust never happened",
+    "obama was born in kenya",
+    "gas prices doubled since january",
+    "imo the election was stolen",
+    "covid is just the flu",
+    "sugar makes kids hyperactive",
+    "the government is spraying chemicals from planes",
+    "Bananas are radioactive",
+    "the great wall is visible from space",
+    "I feel like crime went up 40% this year",
+    "Germany banned nuclear power in 2023",
+    "global warming stopped in 1998",
+    "vitamin c cures the common cold",
+]
+
+NON_CLAIMS = [
+    "Messi is the goat",
+    "lmao",
+    "this is the way",
+    "Nice.",
+    "I think you're right",
+    "that movie was amazing",
+    "Who asked though?",
+    "rip my inbox",
+    "Username checks out",
+    "ngl this slaps",
+    "I love how wholesome this is",
+    "Take my upvote and leave",
+    "Following for updates",
+    "can't wait for the sequel",
+    "Happy cake day!",
+    "the ending was so good",
+    "you are the best",
+    "Me too, honestly",
+    "Ok boomer",
+    "this thread is gold",
+]
+
+
+@pytest.mark.parametrize("text", [
+    "the earth is flat",
+    "masks dont work at all",
+    "5g spreads covid",
+    "I think vaccines cause autism",
+])
+def test_lowercase_and_hedged_claims_are_checked(text):
+    assert claim_score(text) >= CLAIM_MIN_SCORE
+
+
+@pytest.mark.parametrize("text", ["Messi is the goat", "that movie was amazing", "you are the best"])
+def test_judgements_are_not_claims(text):
+    assert claim_score(text) < CLAIM_MIN_SCORE
+
+
+def test_held_out_recall():
+    checked = detect_claims(CLAIMS)
+    assert sum(checked) / len(CLAIMS) >= 0.9, [t for t, c in zip(CLAIMS, checked) if not c]
+
+
+def test_held_out_non_claims_mostly_skipped():
+    checked = detect_claims(NON_CLAIMS)
+    assert sum(checked) / len(NON_CLAIMS) <= 0.25, [t for t, c in zip(NON_CLAIMS, checked) if c]
+
+
+def test_zero_threshold_checks_everything():
+    assert detect_claims(NON_CLAIMS, min_score=0) == [True] * len(NON_CLAIMS)
@@ -0,0 +1,55 @@
+"""
+Duplicate comments are analyzed once, including across iter_report's streaming buffers.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agents  # noqa: E402
+
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """Records every body sent for analysis; each gets a distinct score."""
+    seen = []
+
+    def analyze_bodies(bodies, batch_size, confidence_threshold, claim_min_score=None):
+        seen.extend(bodies)
+        return [(float(len(seen) - len(bodies) + i), "True", "llm") for i in range(len(bodies))]
+
+    monkeypatch.setattr(agents, "_analyze_bodies", analyze_bodies)
+    monkeypatch.setattr(agents, "DEDUP_ENABLED", True)
+    return seen
+
+
+def post(title, *bodies):
+    return {"Post Title": title, "Comments": [{"Comment Body": body} for body in bodies]}
+
+
+def test_iter_report_reuses_analyses_across_buffers(analyzed):
+    posts = [
+        post("a", "The bill passed the Senate 52 to 48", "Vaccines cause autism in kids"),
+        post("b", "the bill passed the senate 52 to 48!!", "Tesla sold 1.8 million cars in 2023"),
+        post("c", "Vaccines cause autism in kids"),
+    ]
+    rows = list(agents.iter_report(posts, batch_size=2))
+
+    assert len(rows) == 5
+    assert analyzed == [
+        "The bill passed the Senate 52 to 48", "Vaccines cause autism in kids", "Tesla sold 1.8 million cars in 2023",
+    ]
+    bill, vaccines, bill_again, tesla, vaccines_again = rows
+    for first, later in ((bill, bill_again), (vaccines, vaccines_again)):
+        assert later["Cluster ID"] == first["Cluster ID"]
+        assert later["Sentiment"] == first["Sentiment"]
+    assert tesla["Cluster ID"] not in (bill["Cluster ID"], vaccines["Cluster ID"])
+
+
+def test_generate_report_without_known_analyzes_every_call(analyzed):
+    posts = [post("a", "Vaccines cause autism in kids")]
+    agents.generate_report(posts, batch_size=2)
+    agents.generate_report(posts, batch_size=2)
+    assert len(analyzed) == 2
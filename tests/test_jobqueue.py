@@ -0,0 +1,103 @@
+"""
+Job queue leases: expiry and re-claim, stale workers, max_attempts, and how
+enqueue_analysis splits posts into tasks. Time is a fake clock, so nothing sleeps.
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobqueue  # noqa: E402
+from jobqueue import JobQueue, DONE, FAILED, QUEUED  # noqa: E402
+from worker import enqueue_analysis  # noqa: E402
+
+VISIBILITY_TIMEOUT = 5
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(jobqueue, "time", SimpleNamespace(time=lambda: now[0]))
+
+    def advance(seconds):
+        now[0] += seconds
+
+    return advance
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), visibility_timeout=VISIBILITY_TIMEOUT, max_attempts=2)
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    job_id = queue.enqueue([{"n": 1}])
+    task = queue.claim("w1")
+    assert task["payload"] == {"n": 1} and task["attempts"] == 1
+    assert queue.claim("w2") is None
+
+    clock(VISIBILITY_TIMEOUT / 2)
+    assert queue.heartbeat(task["id"], "w1")
+    clock(VISIBILITY_TIMEOUT - 1)
+    assert queue.claim("w2") is None          # the heartbeat extended the lease
+
+    clock(VISIBILITY_TIMEOUT)
+    again = queue.claim("w2")
+    assert again["id"] == task["id"] and again["attempts"] == 2
+    assert queue.progress(job_id)["running"] == 1
+
+
+def test_stale_worker_cannot_complete(queue, clock):
+    job_id = queue.enqueue([{"n": 1}])
+    task = queue.claim("w1")
+    clock(VISIBILITY_TIMEOUT + 1)
+    queue.claim("w2")
+
+    assert not queue.complete(task["id"], "w1", ["stale"])
+    assert not queue.heartbeat(task["id"], "w1")
+    assert not queue.fail(task["id"], "w1", "boom", task["attempts"])
+    assert queue.complete(task["id"], "w2", ["fresh"])
+    assert queue.results(job_id) == [(0, ["fresh"])]
+    assert queue.progress(job_id)["finished"]
+
+
+def test_task_fails_after_max_attempts_of_expired_leases(queue, clock):
+    job_id = queue.enqueue([{"n": 1}])
+    for worker in ("w1", "w2"):
+        assert queue.claim(worker) is not None
+        clock(VISIBILITY_TIMEOUT + 1)
+
+    assert queue.claim("w3") is None
+    progress = queue.progress(job_id)
+    assert progress[FAILED] == 1 and progress["finished"]
+    assert queue.errors(job_id) == [(0, "visibility timeout exceeded")]
+
+
+def test_fail_requeues_until_max_attempts(queue):
+    job_id = queue.enqueue([{"n": 1}])
+    task = queue.claim("w1")
+    assert queue.fail(task["id"], "w1", "boom", task["attempts"])
+    assert queue.progress(job_id)[QUEUED] == 1
+
+    task = queue.claim("w2")
+    assert queue.fail(task["id"], "w2", "boom again", task["attempts"])
+    assert queue.progress(job_id)[FAILED] == 1
+    assert queue.errors(job_id) == [(0, "boom again")]
+
+
+def test_enqueue_analysis_chunks_by_comment_count(queue):
+    counts = [5, 20, 3, 3, 30, 1]
+    posts = [{"Post Title": f"p{i}", "Comments": [{"Comment Body": "x"}] * n} for i, n in enumerate(counts)]
+    job_id = enqueue_analysis(queue, posts, target_comments=10, meta={"source": "test"})
+
+    tasks = []
+    while (task := queue.claim("w1")) is not None:
+        tasks.append(task)
+        queue.complete(task["id"], "w1", [])
+    titles = [[post["Post Title"] for post in task["payload"]["posts"]] for task in tasks]
+    assert titles == [["p0", "p1"], ["p2", "p3", "p4"], ["p5"]]
+    assert [task["job_id"] for task in tasks] == [job_id] * 3
+    assert queue.progress(job_id)[DONE] == 3
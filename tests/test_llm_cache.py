@@ -0,0 +1,45 @@
+"""
+LLM reply cache: LRU/TTL bounds, and a broken database degrading to misses, not errors.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_cache as llm_cache_module  # noqa: E402
+from llm_cache import LLMCache  # noqa: E402
+from metrics import metrics  # noqa: E402
+
+
+def test_round_trip_and_ttl(tmp_path, monkeypatch):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"), ttl=60, enabled=True)
+    cache.put("k", "reply")
+    assert cache.get("k") == "reply"
+    assert cache.get("missing") is None
+
+    monkeypatch.setattr(llm_cache_module.time, "time", lambda: 10 ** 10)
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_lru_bound_is_enforced_by_periodic_sweeps(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache_module, "LLM_CACHE_EVICT_EVERY", 5)
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"), ttl=0, max_entries=10, enabled=True)
+    for i in range(30):
+        cache.put(f"k{i}", str(i))
+    count = cache._db().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    assert count == 10
+    assert cache.get("k29") == "29"
+    assert cache.get("k0") is None
+
+
+def test_database_errors_are_misses_and_no_ops(tmp_path):
+    # A directory cannot be opened as a database: every access raises sqlite3.Error.
+    cache = LLMCache(path=str(tmp_path), enabled=True)
+    before = metrics.events.get("llm_cache_errors", 0)
+
+    cache.put("k", "reply")
+    assert cache.get("k") is None
+    assert cache.stats()["errors"] == 2
+    assert cache.misses == 1
+    assert metrics.events.get("llm_cache_errors", 0) == before + 2
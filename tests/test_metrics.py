@@ -0,0 +1,63 @@
+"""
+Per-run metrics: a run records the work started from its own context, including the
+fetch pool's threads, and nothing from concurrent runs or background threads.
+"""
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import agents  # noqa: E402
+from metrics import metrics  # noqa: E402
+from fake_reddit import FakeReddit  # noqa: E402
+from fake_model import FakeModelBackend  # noqa: E402
+
+
+def test_concurrent_runs_only_see_their_own_events():
+    runs = {}
+    started = threading.Barrier(2)
+
+    def session(name, count):
+        with metrics.run() as run:
+            started.wait()
+            for _ in range(count):
+                metrics.incr("test_session_event")
+            runs[name] = run
+
+    threads = [threading.Thread(target=session, args=(name, count)) for name, count in (("a", 3), ("b", 5))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert runs["a"].events == {"test_session_event": 3}
+    assert runs["b"].events == {"test_session_event": 5}
+
+
+def test_background_thread_is_not_recorded_in_a_run():
+    with metrics.run() as run:
+        thread = threading.Thread(target=metrics.incr, args=("test_background_event",))
+        thread.start()
+        thread.join()
+    assert "test_background_event" not in run.events
+
+
+def test_fetch_pool_work_lands_in_the_callers_run(monkeypatch):
+    reddit = FakeReddit(posts_per_subreddit=3, comments_per_post=5, max_depth=1)
+    monkeypatch.setattr(agents, "_reddit_override", reddit)
+    monkeypatch.setattr(agents, "_agent_backend", FakeModelBackend(latency=0, jitter=0))
+    monkeypatch.setattr(agents.llm_cache, "enabled", False)
+    monkeypatch.setattr(agents.reddit_governor, "max_rate", None)
+    monkeypatch.setattr(agents.model_governor, "max_rate", None)
+
+    with metrics.run() as run:
+        posts = agents.fetch_posts(["python", "rust"], ["the"], 3, 2, max_workers=4)
+    assert posts
+    assert run.reddit["requests"] == reddit.requests > 0
+    assert run.llm["collector"]["calls"] == len(posts)
+
+    metrics.incr("test_after_run_event")
+    assert "test_after_run_event" not in run.events
@@ -0,0 +1,118 @@
+"""
+Stateless agent mode: every call is scored against the system prompt plus that item
+only, so prompt size stays flat however many comments a run (or a session) analyzes.
+"""
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agents  # noqa: E402
+from prompts import count_tokens  # noqa: E402
+
+CALLS = 1000
+COMMENTS = [
+    "The new policy will cut emissions by a third before 2030.",
+    "lol no way this is real",
+    "Honestly the market has been weird all week, not sure what to think.",
+]
+
+
+class StubChatAgent:
+    """Keeps the conversation like camel's ChatAgent and records each step's prompt size."""
+
+    def __init__(self, system_prompt):
+        self.system_prompt = system_prompt
+        self.history = []
+        self.prompt_tokens = []
+
+    def reset(self):
+        self.history = []
+
+    def step(self, prompt):
+        self.history.append(prompt)
+        tokens = count_tokens(self.system_prompt) + sum(count_tokens(m) for m in self.history)
+        self.prompt_tokens.append(tokens)
+        reply = "0.5"
+        self.history.append(reply)
+        return SimpleNamespace(
+            msgs=[SimpleNamespace(content=reply)],
+            info={"usage": {"prompt_tokens": tokens, "completion_tokens": 1}},
+        )
+
+
+@pytest.fixture
+def stub_agents(monkeypatch):
+    created = {}
+
+    def new_agent(name):
+        created[name] = StubChatAgent(agents.AGENT_PROMPTS[name])
+        return created[name]
+
+    monkeypatch.setattr(agents, "_new_agent", new_agent)
+    monkeypatch.setattr(agents, "_resources", {})
+    monkeypatch.setattr(agents, "_agent_backend", None)
+    monkeypatch.setattr(agents.model_governor, "max_rate", None)
+    return created
+
+
+def run_sentiment_calls(calls=CALLS):
+    prefix = "Analyze sentiment (positive=1, neutral=0, negative=-1). Comment: "
+    for i in range(calls):
+        assert agents._agent_step("sentiment", prefix + COMMENTS[i % len(COMMENTS)], use_cache=False) == "0.5"
+
+
+def test_prompt_size_stays_flat_over_1000_calls(stub_agents, monkeypatch):
+    monkeypatch.setattr(agents, "AGENT_STATELESS", True)
+    run_sentiment_calls()
+
+    tokens = stub_agents["sentiment"].prompt_tokens
+    assert len(tokens) == CALLS
+    # Call 1,000 scores the same comment as call 1 and sends exactly as many tokens.
+    assert tokens[CALLS - 1] == tokens[0]
+    assert all(tokens[i] == tokens[i % len(COMMENTS)] for i in range(CALLS))
+
+
+def test_stateful_mode_accumulates_history(stub_agents, monkeypatch):
+    # Control: without resets the same stub's prompts grow with every call.
+    monkeypatch.setattr(agents, "AGENT_STATELESS", False)
+    run_sentiment_calls(calls=30)
+
+    tokens = stub_agents["sentiment"].prompt_tokens
+    assert tokens[-1] > 10 * tokens[0]
+
+
+def test_context_token_limit_caps_each_call(stub_agents, monkeypatch):
+    monkeypatch.setattr(agents, "AGENT_STATELESS", True)
+    monkeypatch.setattr(agents, "AGENT_CONTEXT_TOKEN_LIMIT", 200)
+    agents._agent_step("sentiment", "word " * 5000, use_cache=False)
+
+    (tokens,) = stub_agents["sentiment"].prompt_tokens
+    assert 190 <= tokens <= 200
+
+
+class EchoBatchAgent(StubChatAgent):
+    """Answers a batch prompt with one result per comment id it could parse."""
+
+    def step(self, prompt):
+        self.prompt_tokens.append(count_tokens(self.system_prompt) + count_tokens(prompt))
+        items = json.loads(prompt.split("\n", 1)[1])
+        reply = json.dumps([{"id": item["id"], "sentiment": 0.5, "verdict": "True"} for item in items])
+        return SimpleNamespace(msgs=[SimpleNamespace(content=reply)], info={})
+
+
+def test_context_token_limit_compresses_batch_items(stub_agents, monkeypatch):
+    # The JSON batch is fitted item by item, never cut mid-array.
+    monkeypatch.setattr(agents, "AGENT_STATELESS", True)
+    monkeypatch.setattr(agents, "AGENT_CONTEXT_TOKEN_LIMIT", 600)
+    monkeypatch.setattr(agents.llm_cache, "enabled", False)
+    monkeypatch.setattr(agents, "_new_agent", lambda name: stub_agents.setdefault(name, EchoBatchAgent(agents.AGENT_PROMPTS[name])))
+    bodies = [f"Comment {i}: " + "the senate passed the bill last year " * 40 for i in range(10)]
+
+    assert agents._analyze_batch(bodies) == [(0.5, "True")] * 10
+    (tokens,) = stub_agents["analysis"].prompt_tokens
+    assert tokens <= 600
@@ -0,0 +1,99 @@
+"""
+Watch mode against the offline FakeReddit: the first cycle analyzes what is there, an
+idle cycle adds nothing, later cycles pick up only new posts and comments, and the
+state file round-trips.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import agents  # noqa: E402
+import watch  # noqa: E402
+from watch import WatchState, run_cycle  # noqa: E402
+from fake_reddit import FakeComment, FakeReddit  # noqa: E402
+from fake_model import FakeModelBackend  # noqa: E402
+
+SUBREDDIT = "python"
+COMMENT_LIMIT = 2
+
+
+@pytest.fixture
+def reddit(monkeypatch):
+    client = FakeReddit(posts_per_subreddit=3, comments_per_post=4, max_depth=1)
+    monkeypatch.setattr(agents, "_reddit_override", client)
+    monkeypatch.setattr(agents, "_agent_backend", FakeModelBackend(latency=0, jitter=0))
+    monkeypatch.setattr(agents.llm_cache, "enabled", False)
+    monkeypatch.setattr(agents.reddit_governor, "max_rate", None)
+    monkeypatch.setattr(agents.model_governor, "max_rate", None)
+    return client
+
+
+@pytest.fixture
+def fetch_calls(monkeypatch):
+    """Posts handed to the bounded fetch pool, per call."""
+    calls = []
+    iter_fetched = agents._iter_fetched
+
+    def recording(*args, posts=None, **kwargs):
+        calls.append([post.name for _, post in posts or ()])
+        return iter_fetched(*args, posts=posts, **kwargs)
+
+    monkeypatch.setattr(agents, "_iter_fetched", recording)
+    return calls
+
+
+def cycle(state):
+    return run_cycle(state, [SUBREDDIT], comment_limit=COMMENT_LIMIT, batch_size=4)
+
+
+def test_cycles_are_incremental(tmp_path, reddit, fetch_calls):
+    state = WatchState(str(tmp_path / "watch_state.json"))
+
+    assert cycle(state) == 3 * COMMENT_LIMIT
+    assert sorted(fetch_calls[0]) == ["t3_python0", "t3_python1", "t3_python2"]
+    assert len(state.subreddit(SUBREDDIT)["posts"]) == 3
+
+    requests, collector_calls = reddit.requests, agents._agent_backend.calls
+    assert cycle(state) == 0
+    assert fetch_calls[1] == []
+    assert agents._agent_backend.calls == collector_calls
+    assert reddit.requests - requests == 2          # one new-posts and one new-comments listing
+
+    # A new post, and a new comment on a post that is already tracked.
+    reddit.posts_per_subreddit = 4
+    tracked = reddit._submission(SUBREDDIT, 0)
+    reply = FakeComment("python0_new", "the election data was announced today", 10,
+                        1_700_000_000 + 10 * 3600, tracked.name)
+    tracked._comments.append(reply)
+
+    assert cycle(state) == COMMENT_LIMIT + 1
+    assert fetch_calls[2] == ["t3_python3"]
+    assert state.data["rows"]["python0_new"]["Comment"] == reply.body
+    assert "python0_new" in state.subreddit(SUBREDDIT)["posts"]["t3_python0"]["seen_comments"]
+    assert len(state.report) == 4 * COMMENT_LIMIT + 1
+    assert cycle(state) == 0
+
+
+def test_state_round_trips_through_save_and_load(tmp_path, reddit):
+    path = str(tmp_path / "watch_state.json")
+    state = WatchState(path)
+    cycle(state)
+
+    loaded = WatchState.load(path)
+    assert loaded.data == state.data
+    assert cycle(loaded) == 0
+    assert WatchState.load(str(tmp_path / "missing.json")).data == {"subreddits": {}, "rows": {}}
+
+
+def test_tracked_posts_are_capped(tmp_path, reddit, monkeypatch):
+    monkeypatch.setattr(watch, "WATCH_MAX_TRACKED_POSTS", 2)
+    state = WatchState(str(tmp_path / "watch_state.json"))
+    cycle(state)
+
+    assert sorted(state.subreddit(SUBREDDIT)["posts"]) == ["t3_python1", "t3_python2"]
+    assert len(state.report) == 3 * COMMENT_LIMIT
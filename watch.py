@@ -0,0 +1,192 @@
+"""
+Incremental watch mode: each cycle analyzes only posts and comments that appeared
+since the previous cycle and merges them into a persisted report.
+
+    python watch.py news science --keywords AI elections --interval 300
+"""
+import os
+import json
+import time
+import argparse
+import traceback
+
+import agents
+from selection import KeywordMatcher
+
+# ---------------- Watch settings ---------------- #
+WATCH_STATE_PATH = os.getenv("WATCH_STATE_PATH", "watch_state.json")
+WATCH_POST_SCAN = 100          # newest posts scanned per cycle (stops early at the cursor)
+WATCH_COMMENT_SCAN = 500       # newest subreddit comments scanned per cycle
+WATCH_MAX_TRACKED_POSTS = 200  # posts per subreddit whose new comments are followed
+
+
+class WatchState:
+    """
+    Per-subreddit high-water marks plus the merged report, persisted as JSON.
+
+    {"subreddits": {name: {"post_cursor": {"name", "created_utc"},
+                           "comment_cursor": {"name", "created_utc"},
+                           "posts": {post fullname: post fields + "seen_comments"}}},
+     "rows": {comment id: report row}}
+    """
+
+    def __init__(self, path=WATCH_STATE_PATH, data=None):
+        self.path = path
+        self.data = data or {"subreddits": {}, "rows": {}}
+
+    @classmethod
+    def load(cls, path=WATCH_STATE_PATH):
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return cls(path, json.load(f))
+        return cls(path)
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def subreddit(self, name):
+        return self.data["subreddits"].setdefault(
+            name.lower(), {"post_cursor": None, "comment_cursor": None, "posts": {}}
+        )
+
+    @property
+    def report(self):
+        return list(self.data["rows"].values())
+
+
+def _cursor(item):
+    return {"name": item.name, "created_utc": getattr(item, "created_utc", 0)}
+
+
+def _newer_than(listing, cursor):
+    """Items of a newest-first listing up to (excluding) the cursor; PRAW pages lazily."""
+    for item in listing:
+        if cursor and (item.name == cursor["name"] or getattr(item, "created_utc", 0) < cursor["created_utc"]):
+            return
+        yield item
+
+
+def _post_meta(post_dict, post):
+    meta = {k: v for k, v in post_dict.items() if k != "Comments"}
+    meta["created_utc"] = getattr(post, "created_utc", 0)
+    meta["seen_comments"] = [c.id for c in post.comments.list() if hasattr(c, "id")]
+    return meta
+
+
+def _analyze(entries, batch_size=None):
+    """entries: (post meta, [(comment id, comment dict)]) -> {comment id: report row}"""
+    posts, ids = [], []
+    for meta, comments in entries:
+        posts.append(dict(meta, Comments=[comment for _, comment in comments]))
+        ids.extend(comment_id for comment_id, _ in comments)
+    return dict(zip(ids, agents.generate_report(posts, batch_size)))
+
+
+def run_cycle(state, subreddits, keywords=None, reddit=None, comment_limit=None, batch_size=None,
+              max_workers=None):
+    """
+    One incremental pass. New posts get a collector summary and their top comments
+    analyzed (fetched concurrently, like fetch_posts); new comments on already tracked
+    posts are analyzed on their own. Returns the number of new report rows.
+    """
+    reddit = reddit or agents._reddit_client()
+    matcher = KeywordMatcher(keywords, agents.KEYWORD_WORD_BOUNDARY, agents.KEYWORD_CASE_SENSITIVE)
+    comment_limit = comment_limit or 3
+    new_rows = {}
+
+    for name in subreddits:
+        sub_state = state.subreddit(name)
+        subreddit = reddit.subreddit(name)
+        tracked = sub_state["posts"]
+        entries = []
+
+        # New posts: full fetch (top-k comments + collector summary) once.
+        listed = agents._reddit_call(
+            lambda: list(_newer_than(subreddit.new(limit=WATCH_POST_SCAN), sub_state["post_cursor"])), client=reddit
+        )
+        new_posts = [post for post in listed if post.name not in tracked]
+        fetched = dict(agents._iter_fetched(
+            [name], matcher, None, comment_limit, max_workers, posts=[(name, post) for post in new_posts]
+        ))
+        for index, post in enumerate(new_posts):
+            post_dict = fetched[index]
+            tracked[post.name] = _post_meta(post_dict, post)
+            entries.append((tracked[post.name], [(c["Comment ID"], c) for c in post_dict["Comments"]]))
+        if new_posts:
+            sub_state["post_cursor"] = _cursor(new_posts[0])
+
+        # New comments: one listing call, only items newer than the comment cursor.
+        if sub_state["comment_cursor"] is None:
+            new_comments = agents._reddit_call(lambda: list(subreddit.comments(limit=1)), client=reddit)
+        else:
+            new_comments = agents._reddit_call(
+                lambda: list(_newer_than(subreddit.comments(limit=WATCH_COMMENT_SCAN), sub_state["comment_cursor"])),
+                client=reddit,
+            )
+        if new_comments:
+            sub_state["comment_cursor"] = _cursor(new_comments[0])
+
+        by_post, seen = {}, {}
+        for comment in reversed(new_comments):
+            link_id = getattr(comment, "link_id", None)
+            meta = tracked.get(link_id)
+            if meta is None:
+                continue
+            post_seen = seen.setdefault(link_id, set(meta["seen_comments"]))
+            if comment.id in post_seen or not matcher.matches(comment.body):
+                continue
+            post_seen.add(comment.id)
+            meta["seen_comments"].append(comment.id)
+            by_post.setdefault(comment.link_id, []).append(
+                (comment.id, {"Comment Body": comment.body, "Upvotes": getattr(comment, "score", 0), "Comment ID": comment.id})
+            )
+        entries.extend((tracked[link_id], comments) for link_id, comments in by_post.items())
+
+        new_rows.update(_analyze(entries, batch_size))
+
+        # Keep only the newest tracked posts; their rows stay in the report.
+        if len(tracked) > WATCH_MAX_TRACKED_POSTS:
+            newest = sorted(tracked, key=lambda k: tracked[k]["created_utc"], reverse=True)
+            for fullname in newest[WATCH_MAX_TRACKED_POSTS:]:
+                del tracked[fullname]
+
+    state.data["rows"].update(new_rows)
+    state.save()
+    return len(new_rows)
+
+
+def watch(subreddits, keywords=None, interval=300, cycles=None, state_path=WATCH_STATE_PATH, reddit=None):
+    state = WatchState.load(state_path)
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        started = time.monotonic()
+        try:
+            added = run_cycle(state, subreddits, keywords, reddit)
+            print(f"Watch cycle {cycle + 1}: {added} new rows, {len(state.data['rows'])} total")
+        except Exception as e:
+            print("Exception in watch cycle:", e)
+            traceback.print_exc()
+        cycle += 1
+        if cycles is None or cycle < cycles:
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("subreddits", nargs="+")
+    parser.add_argument("--keywords", nargs="*", default=None)
+    parser.add_argument("--interval", type=int, default=300, help="seconds between cycles")
+    parser.add_argument("--cycles", type=int, default=None, help="stop after N cycles (default: run forever)")
+    parser.add_argument("--state", default=WATCH_STATE_PATH, help="state file path")
+    args = parser.parse_args()
+    watch(args.subreddits, args.keywords, args.interval, args.cycles, args.state)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Analysis workers: pull comment batches from the job queue (jobqueue.py), run
+generate_report on them and store the rows back for the app to pick up. Start more
+processes (or more worker.py instances on the same box) to scale out.
+
+    python worker.py --processes 4
+    python worker.py --processes 2 --exit-when-idle     # drain the queue and stop
+"""
+import os
+import signal
+import socket
+import argparse
+import threading
+import traceback
+import multiprocessing
+
+from jobqueue import JobQueue, JOB_QUEUE_PATH
+
+WORKER_POLL_INTERVAL = 1.0        # seconds between claims when the queue is empty
+TASK_TARGET_COMMENTS = 20         # comments per queued task (a few analysis batches)
+
+
+def enqueue_analysis(queue, posts, target_comments=TASK_TARGET_COMMENTS, meta=None):
+    """Split fetched posts into tasks of about `target_comments` comments; returns the job id."""
+    payloads, chunk, pending = [], [], 0
+    for post in posts:
+        chunk.append(post)
+        pending += len(post.get("Comments", []))
+        if pending >= target_comments:
+            payloads.append({"posts": chunk})
+            chunk, pending = [], 0
+    if chunk:
+        payloads.append({"posts": chunk})
+    return queue.enqueue(payloads, meta)
+
+
+def _heartbeat(queue, task, worker_id, stop):
+    while not stop.wait(queue.visibility_timeout / 3):
+        if not queue.heartbeat(task["id"], worker_id):
+            return
+
+
+def run_task(queue, task, worker_id):
+    import agents
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(queue, task, worker_id, stop), daemon=True)
+    beat.start()
+    try:
+        rows = agents.generate_report(task["payload"]["posts"])
+    except Exception as e:
+        print(f"[{worker_id}] task {task['id']} failed (attempt {task['attempts']}):", e)
+        traceback.print_exc()
+        queue.fail(task["id"], worker_id, e, task["attempts"])
+        return False
+    finally:
+        stop.set()
+    if not queue.complete(task["id"], worker_id, rows):
+        print(f"[{worker_id}] lease on task {task['id']} was lost; result discarded")
+        return False
+    return True
+
+
+def work(path=JOB_QUEUE_PATH, visibility_timeout=None, exit_when_idle=False, poll_interval=WORKER_POLL_INTERVAL):
+    """Worker loop for one process; SIGTERM/SIGINT finish the current task, then exit."""
+    queue = JobQueue(path) if visibility_timeout is None else JobQueue(path, visibility_timeout)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stopping.set())
+
+    processed = 0
+    while not stopping.is_set():
+        task = queue.claim(worker_id)
+        if task is None:
+            if exit_when_idle:
+                break
+            stopping.wait(poll_interval)
+            continue
+        processed += run_task(queue, task, worker_id)
+    print(f"[{worker_id}] stopped after {processed} tasks")
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--queue", default=JOB_QUEUE_PATH, help="queue database path")
+    parser.add_argument("--visibility-timeout", type=int, default=None, help="task lease in seconds")
+    parser.add_argument("--exit-when-idle", action="store_true", help="stop once the queue is empty")
+    args = parser.parse_args()
+
+    # spawn: every worker builds its own model/Reddit clients and SQLite connections.
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=work, args=(args.queue, args.visibility_timeout, args.exit_when_idle))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()